@@ -0,0 +1,216 @@
+"""
+Batch degree queries: one breadth-first search per distinct source,
+with every target for that source answered from its BFS tree.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+
+import degrees
+import parallel
+
+
+def bfs_tree(source, targets=None):
+    """
+    Returns a dict mapping every person reachable from the source to
+    the (movie_id, parent person_id) pair that first reached them.
+
+    With a set of target person IDs, the search stops as soon as all
+    of them are in the tree.
+    """
+    tree = {source: (None, None)}
+    remaining = None
+    if targets is not None:
+        remaining = set(targets)
+        remaining.discard(source)
+        if not remaining:
+            return tree
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        for movie_id, neighbor in degrees.neighbors_for_person(person_id):
+            if neighbor not in tree:
+                tree[neighbor] = (movie_id, person_id)
+                queue.append(neighbor)
+                if remaining is not None:
+                    remaining.discard(neighbor)
+                    if not remaining:
+                        return tree
+    return tree
+
+
+def path_in_tree(tree, target):
+    """
+    Returns the (movie_id, person_id) path from a BFS tree's source to
+    the target, or None if the target was not reached.
+    """
+    if target not in tree:
+        return None
+    solution = []
+    movie_id, parent = tree[target]
+    while parent is not None:
+        solution.append((movie_id, target))
+        target = parent
+        movie_id, parent = tree[target]
+    solution.reverse()
+    return solution
+
+
+def resolve(person):
+    """
+    Returns the person ID for a person ID or an unambiguous name,
+    or None if there is no such person.
+    """
+    if person in degrees.people:
+        return person
+    person_ids = degrees.names.get(person.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    return None
+
+
+def read_queries(path, source=None):
+    """
+    Yields (source, target) pairs from a file. Without a `source`, each
+    CSV row holds a source and a target; with one, each row is a target.
+    Values may be person IDs or unambiguous names.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#"):
+                continue
+            if source is not None:
+                yield source, row[0].strip()
+            else:
+                yield row[0].strip(), row[1].strip()
+
+
+def group_by_source(queries):
+    """
+    Returns a dict mapping each distinct source to its list of
+    (index, target) pairs, in order of first appearance.
+    """
+    by_source = {}
+    for index, (source, target) in enumerate(queries):
+        by_source.setdefault(source, []).append((index, target))
+    return by_source
+
+
+def answer_source(source, targets):
+    """
+    Returns (index, source, target, path) results for every
+    (index, target) pair of a single source, from one BFS.
+    """
+    source_id = resolve(source)
+    target_ids = [resolve(target) for _, target in targets]
+    tree = {}
+    if source_id is not None:
+        tree = bfs_tree(source_id, {target_id for target_id in target_ids
+                                    if target_id is not None})
+    results = []
+    for (index, target), target_id in zip(targets, target_ids):
+        path = path_in_tree(tree, target_id) if target_id else None
+        results.append((index, source, target, path))
+    return results
+
+
+def run_batch(queries):
+    """
+    Answers (source, target) queries, running one BFS per distinct
+    source. Yields (index, source, target, path) as each source
+    finishes, where index is the query's position in the input and
+    path is None when the people are not connected or not found.
+    """
+    for source, targets in group_by_source(queries).items():
+        yield from answer_source(source, targets)
+
+
+def write_results(results, out, format="csv"):
+    """
+    Stream batch results to a file as CSV or JSON lines. Returns the
+    number of results written.
+    """
+    count = 0
+    writer = csv.writer(out) if format == "csv" else None
+    if writer:
+        writer.writerow(["index", "source", "target", "degrees", "path"])
+    for index, source, target, path in results:
+        count += 1
+        degrees_apart = len(path) if path is not None else None
+        if writer:
+            steps = " ".join(f"{movie_id}:{person_id}"
+                             for movie_id, person_id in path or [])
+            writer.writerow([index, source, target,
+                             "" if degrees_apart is None else degrees_apart,
+                             steps])
+        else:
+            out.write(json.dumps({
+                "index": index,
+                "source": source,
+                "target": target,
+                "degrees": degrees_apart,
+                "path": path
+            }) + "\n")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a batch of degrees of separation queries.")
+    parser.add_argument("directory")
+    parser.add_argument("queries",
+                        help="CSV of source,target rows, or of targets "
+                             "when --source is given")
+    parser.add_argument("--source", help="person ID or name for all queries")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--output", metavar="PATH",
+                        help="write results here instead of stdout")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the compact integer-indexed graph backend")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="memory-map the graph from a binary snapshot")
+    parser.add_argument("--cache", type=int, default=0, metavar="SIZE",
+                        help="cache up to SIZE expanded neighbor sets")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (needs --snapshot)")
+    args = parser.parse_args()
+    if args.workers > 1 and args.snapshot is None:
+        parser.error("--workers requires --snapshot")
+
+    if args.cache:
+        degrees.enable_neighbor_cache(args.cache)
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact,
+                      snapshot=args.snapshot)
+    print("Data loaded.", file=sys.stderr)
+
+    queries = read_queries(args.queries, source=args.source)
+    out = open(args.output, "w", encoding="utf-8", newline="") \
+        if args.output else sys.stdout
+    if args.workers > 1:
+        results = parallel.run_parallel(args.snapshot, queries, args.workers)
+    else:
+        results = run_batch(queries)
+    start = time.perf_counter()
+    try:
+        count = write_results(results, out, format=args.format)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{count} queries in {elapsed:.3f}s ({rate:.1f} queries/s).",
+          file=sys.stderr)
+    if degrees.neighbor_cache is not None and args.workers <= 1:
+        info = degrees.cache_info()
+        print(f"Neighbor cache: {info.hits} hits, {info.misses} misses.",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
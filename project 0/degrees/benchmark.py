@@ -0,0 +1,240 @@
+"""
+Benchmark degrees search over reproducible synthetic datasets.
+
+Generates a bipartite actor/movie graph with power-law actor degrees,
+then times load_data, shortest_path and neighbors_for_person on it and
+writes the results as JSON for comparison across commits.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import accumulate
+
+import degrees
+
+
+def generate(directory, edges, people=None, movies=None,
+             exponent=1.0, seed=0):
+    """
+    Write people.csv, movies.csv and stars.csv for a synthetic dataset
+    with `edges` star rows. Actors are drawn with probability
+    proportional to rank ** -exponent, movies uniformly.
+    """
+    people = people or max(2, edges // 4)
+    movies = movies or max(1, edges // 8)
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(f"{directory}/people.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            writer.writerow([i, f"Person {i}", 1900 + rng.randrange(120)])
+
+    with open(f"{directory}/movies.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([i, f"Movie {i}", 1900 + rng.randrange(120)])
+
+    weights = list(accumulate((rank + 1) ** -exponent
+                              for rank in range(people)))
+    with open(f"{directory}/stars.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        batch = 10000
+        for start in range(0, edges, batch):
+            count = min(batch, edges - start)
+            actors = rng.choices(range(people), cum_weights=weights, k=count)
+            for actor in actors:
+                writer.writerow([actor, rng.randrange(movies)])
+
+
+def percentiles(samples):
+    """
+    Returns p50, p99 and mean of a list of latencies, in milliseconds.
+    """
+    if not samples:
+        return {"p50_ms": None, "p99_ms": None, "mean_ms": None}
+    ordered = sorted(samples)
+    return {
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1,
+                              int(len(ordered) * 0.99))] * 1000,
+        "mean_ms": sum(ordered) / len(ordered) * 1000
+    }
+
+
+def peak_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(directory, queries=200, compact=False, bidirectional=False,
+        cache=0, seed=0):
+    """
+    Benchmark loading and searching the dataset in `directory`.
+    Returns a dict of results.
+    """
+    if cache:
+        degrees.enable_neighbor_cache(cache)
+    else:
+        degrees.disable_neighbor_cache()
+
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact)
+    load_seconds = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids))
+             for _ in range(queries)]
+
+    # Count expansions by wrapping the function shortest_path calls
+    expanded = 0
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counting_neighbors(person_id):
+        nonlocal expanded
+        expanded += 1
+        return neighbors_for_person(person_id)
+
+    path_times = []
+    expansions = []
+    connected = 0
+    degrees.neighbors_for_person = counting_neighbors
+    try:
+        for source, target in pairs:
+            expanded = 0
+            start = time.perf_counter()
+            path = degrees.shortest_path(source, target,
+                                         bidirectional=bidirectional)
+            path_times.append(time.perf_counter() - start)
+            expansions.append(expanded)
+            connected += path is not None
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+
+    neighbor_times = []
+    for source, _ in pairs:
+        start = time.perf_counter()
+        degrees.neighbors_for_person(source)
+        neighbor_times.append(time.perf_counter() - start)
+
+    return {
+        "load_data": {"seconds": load_seconds},
+        "shortest_path": {
+            **percentiles(path_times),
+            "queries": len(pairs),
+            "connected": connected,
+            "nodes_expanded_mean": sum(expansions) / max(1, len(expansions)),
+            "nodes_expanded_max": max(expansions, default=0)
+        },
+        "neighbors_for_person": percentiles(neighbor_times),
+        "peak_rss_kb": peak_rss_kb()
+    }
+
+
+def compare(old, new):
+    """
+    Print each timing in `new` next to the same timing in `old`.
+    """
+    for section, metrics in new["results"].items():
+        if not isinstance(metrics, dict):
+            metrics = {"": metrics}
+            previous = {"": old["results"].get(section)}
+        else:
+            previous = old["results"].get(section, {})
+        for metric, value in metrics.items():
+            before = previous.get(metric)
+            name = f"{section}.{metric}".rstrip(".")
+            if isinstance(value, (int, float)) and before:
+                print(f"{name}: {before:.4g} -> {value:.4g} "
+                      f"({value / before:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark degrees search on synthetic graphs.")
+    parser.add_argument("--edges", type=int, default=10000,
+                        help="number of star rows to generate")
+    parser.add_argument("--people", type=int,
+                        help="number of people (default edges / 4)")
+    parser.add_argument("--movies", type=int,
+                        help="number of movies (default edges / 8)")
+    parser.add_argument("--exponent", type=float, default=1.0,
+                        help="power-law exponent of actor degrees")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--data", metavar="DIR",
+                        help="keep the generated dataset in DIR "
+                             "(reused if it already exists)")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--bidirectional", action="store_true")
+    parser.add_argument("--cache", type=int, default=0, metavar="SIZE")
+    parser.add_argument("--output", metavar="PATH",
+                        help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare against an earlier results file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.data or tmp
+        if not os.path.exists(f"{directory}/stars.csv"):
+            print("Generating data...", file=sys.stderr)
+            generate(directory, args.edges, args.people, args.movies,
+                     args.exponent, args.seed)
+        print("Running benchmark...", file=sys.stderr)
+        results = run(directory, args.queries, args.compact,
+                      args.bidirectional, args.cache, args.seed)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parameters": {
+            "edges": args.edges, "people": args.people,
+            "movies": args.movies, "exponent": args.exponent,
+            "seed": args.seed, "queries": args.queries,
+            "compact": args.compact, "bidirectional": args.bidirectional,
+            "cache": args.cache
+        },
+        "results": results
+    }
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
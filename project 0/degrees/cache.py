@@ -0,0 +1,56 @@
+"""
+Size-bounded LRU cache of expanded neighbor sets, with hit/miss counters.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class NeighborCache():
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, person_id):
+        """
+        Returns the cached neighbors of a person, or None on a miss.
+        """
+        with self.lock:
+            neighbors = self.entries.get(person_id)
+            if neighbors is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(person_id)
+            return neighbors
+
+    def put(self, person_id, neighbors):
+        with self.lock:
+            self.entries[person_id] = neighbors
+            self.entries.move_to_end(person_id)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, person_ids):
+        """
+        Drop the cached neighbors of the given people.
+        """
+        with self.lock:
+            for person_id in person_ids:
+                self.entries.pop(person_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self.lock:
+            return CacheInfo(self.hits, self.misses,
+                             self.maxsize, len(self.entries))
@@ -1,6 +1,19 @@
-import csv
+import argparse
+import heapq
+import math
+import os
 import sys
+import time
+import warnings
 
+from cache import NeighborCache
+from delta import Delta, apply_to_dicts, apply_to_graph
+from graph import CompactGraph
+from ingest import read_people_and_movies, read_stars
+from landmarks import LandmarkOracle
+from nameindex import NameIndex
+from snapshot import (compile_snapshot, has_sources, is_stale, load_snapshot,
+                      source_of, write_snapshot)
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,64 +25,215 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, set when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Optional LRU cache of neighbors_for_person results
+neighbor_cache = None
+
+# Prefix and fuzzy index over names, built on first use
+name_index = None
+
+# Name most recently passed to person_id_for_name
+last_lookup = None
+
+# People a bidirectional search expands between deadline checks
+DEADLINE_INTERVAL = 64
+
+
+def load_data(directory, compact=False, snapshot=None):
     """
     Load data from CSV files into memory.
+
+    With compact=True the data is held in a CompactGraph, and `names`,
+    `people` and `movies` become read-only views over it. With a
+    `snapshot` path the graph is memory-mapped from that file, which is
+    (re)compiled first if it is missing or older than the CSV files. If
+    the CSV files are missing, an existing snapshot is loaded as it is,
+    with a warning.
+
+    Returns an IngestStats for each CSV file read.
+    """
+    global graph, names, people, movies, name_index
+    if snapshot is not None:
+        if not has_sources(directory) and os.path.exists(snapshot):
+            warnings.warn(f"CSV files missing from {directory}; loading "
+                          f"{snapshot} without checking it is up to date",
+                          stacklevel=2)
+            use_graph(load_snapshot(snapshot))
+        elif is_stale(snapshot, directory):
+            use_graph(compile_snapshot(directory, snapshot))
+        else:
+            use_graph(load_snapshot(snapshot))
+        return graph.ingest_stats
+
+    if compact:
+        use_graph(CompactGraph.from_csv(directory))
+        return graph.ingest_stats
+
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+    name_index = None
+    if neighbor_cache is not None:
+        neighbor_cache.clear()
+
+    # Load people and movies
+    people_rows, movie_rows, stats = read_people_and_movies(directory)
+    for person_id, name, birth in people_rows:
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+        if name.lower() not in names:
+            names[name.lower()] = {person_id}
+        else:
+            names[name.lower()].add(person_id)
+
+    for movie_id, title, year in movie_rows:
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
+    del people_rows, movie_rows
+
+    # Load stars, dropping rows that name an unknown person or movie
+    star_rows, star_stats = read_stars(directory)
+    for person_id, movie_id in star_rows:
+        if person_id not in people or movie_id not in movies:
+            star_stats.dropped += 1
+            continue
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+    stats.append(star_stats)
+    return stats
+
+
+def use_graph(compact_graph, keep_caches=False):
+    """
+    Make a CompactGraph the active backend. With keep_caches=True the
+    neighbor cache and name index are left for the caller to invalidate.
+    """
+    global graph, names, people, movies, name_index
+    graph = compact_graph
+    names = graph.names
+    people = graph.people
+    movies = graph.movies
+    if not keep_caches:
+        name_index = None
+        if neighbor_cache is not None:
+            neighbor_cache.clear()
+
+
+def apply_delta(directory, snapshot=None, oracle=None):
+    """
+    Apply a delta directory (see delta.py) to the loaded data without
+    reloading it. Cached neighbors are dropped only for people whose
+    neighbors changed, the name index only if names changed, and only
+    the affected rows of a LandmarkOracle are recomputed. With a
+    `snapshot` path, the updated compact graph is written back to it.
+
+    Returns the delta.DeltaResult.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global name_index
+    delta = Delta.read(directory)
+    if graph is None:
+        result = apply_to_dicts(delta, names, people, movies)
+    else:
+        result = apply_to_graph(graph, delta)
+        if snapshot is not None:
+            write_snapshot(result.graph, snapshot, source=source_of(snapshot))
+        use_graph(result.graph, keep_caches=True)
+
+    if neighbor_cache is not None:
+        neighbor_cache.invalidate(result.affected)
+    if result.names_changed:
+        name_index = None
+    if oracle is not None:
+        oracle.update(result)
+    return result
+
+
+def enable_neighbor_cache(maxsize=100000):
+    """
+    Cache up to `maxsize` neighbors_for_person results, least recently
+    used first out.
+    """
+    global neighbor_cache
+    neighbor_cache = NeighborCache(maxsize)
+
+
+def disable_neighbor_cache():
+    global neighbor_cache
+    neighbor_cache = None
+
+
+def cache_info():
+    """
+    Returns (hits, misses, maxsize, currsize) for the neighbor cache,
+    or None if it is disabled.
+    """
+    if neighbor_cache is None:
+        return None
+    return neighbor_cache.info()
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Degrees of separation.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the compact integer-indexed graph backend")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="memory-map the graph from a binary snapshot, "
+                             "compiling it if missing or stale")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both ends of the path at once")
+    parser.add_argument("--cache", type=int, default=0, metavar="SIZE",
+                        help="cache up to SIZE expanded neighbor sets")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="precompute distances from K landmark people "
+                             "and search with A* (implies --compact)")
+    parser.add_argument("--delta", action="append", default=[],
+                        metavar="DIR",
+                        help="apply a delta directory after loading "
+                             "(repeatable)")
+    parser.add_argument("--stats", action="store_true",
+                        help="report rows, dropped rows and throughput "
+                             "for each CSV file loaded")
+    args = parser.parse_args()
+    if args.cache:
+        enable_neighbor_cache(args.cache)
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    stats = load_data(args.directory,
+                      compact=args.compact or args.landmarks > 0,
+                      snapshot=args.snapshot)
+    if args.stats:
+        for file_stats in stats:
+            print(f"    {file_stats}")
+    oracle = None
+    if args.landmarks:
+        oracle = LandmarkOracle.build(graph, args.landmarks)
+    for directory in args.delta:
+        apply_delta(directory, snapshot=args.snapshot, oracle=oracle)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message())
     target = person_id_for_name(input("Name: "))
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message())
+
+    if oracle is not None:
+        lower, upper = oracle.bounds(source, target)
+        print(f"Estimated degrees of separation: {lower} to {upper}.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=args.bidirectional,
+                         oracle=oracle)
 
     if path is None:
         print("Not connected.")
@@ -84,13 +248,20 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, oracle=None,
+                  deadline=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
-    If no possible path, returns None.
+    If no possible path, returns None. Searches still running at
+    `deadline`, a time.monotonic() value, raise TimeoutError.
     """
+    if oracle is not None:
+        return astar_path(source, target, oracle, deadline)
+    if bidirectional:
+        return bidirectional_path(source, target, deadline)
+
     start = Node(state = source, parent = None, action = None)
     
     frontier = QueueFrontier()
@@ -103,6 +274,7 @@ def shortest_path(source, target):
             return None
                  
         node = frontier.remove()
+        check_deadline(deadline)
         if node.state == target:
             solution = []
             while node.parent is not None:
@@ -120,11 +292,144 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
+def bidirectional_path(source, target, deadline=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, searching breadth-first from
+    both ends and always expanding the smaller frontier.
+
+    If no possible path, returns None. The deadline is checked every
+    DEADLINE_INTERVAL people expanded, so a timed-out search stops
+    partway through a large layer.
+    """
+    if source == target:
+        return []
+
+    # Map each reached person to (movie_id, parent person_id, depth)
+    forward = {source: (None, None, 0)}
+    backward = {target: (None, None, 0)}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, reached, other = forward_frontier, forward, backward
+        else:
+            frontier, reached, other = backward_frontier, backward, forward
+
+        # Expand one whole layer, keeping the shortest meeting point
+        layer = []
+        meeting = None
+        best = None
+        for expanded, person_id in enumerate(frontier):
+            if expanded % DEADLINE_INTERVAL == 0:
+                check_deadline(deadline)
+            depth = reached[person_id][2] + 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in reached:
+                    continue
+                reached[neighbor] = (movie_id, person_id, depth)
+                layer.append(neighbor)
+                if neighbor in other:
+                    length = depth + other[neighbor][2]
+                    if best is None or length < best:
+                        meeting, best = neighbor, length
+
+        if meeting is not None:
+            return join_paths(forward, backward, meeting)
+
+        if reached is forward:
+            forward_frontier = layer
+        else:
+            backward_frontier = layer
+
+    return None
+
+
+def astar_path(source, target, oracle, deadline=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, using A* search over the compact
+    graph guided by the lower bounds of a LandmarkOracle.
+
+    If no possible path, returns None.
+    """
+    source = oracle.index(source)
+    target = oracle.index(target)
+    estimate = oracle.heuristic(target)
+    if estimate(source) == math.inf:
+        return None
+
+    # Map each reached person index to (movie, parent, depth)
+    reached = {source: (None, None, 0)}
+    explored = set()
+    frontier = [(estimate(source), 0, source)]
+    while frontier:
+        _, depth, person = heapq.heappop(frontier)
+        check_deadline(deadline)
+        if person in explored:
+            continue
+        if person == target:
+            solution = []
+            while reached[person][1] is not None:
+                movie, parent, _ = reached[person]
+                solution.append((oracle.graph.movie_ids[movie],
+                                 oracle.graph.person_ids[person]))
+                person = parent
+            solution.reverse()
+            return solution
+        explored.add(person)
+
+        for movie, neighbor in oracle.graph.neighbor_indices(person):
+            if neighbor in explored:
+                continue
+            if neighbor in reached and reached[neighbor][2] <= depth + 1:
+                continue
+            bound = estimate(neighbor)
+            if bound == math.inf:
+                continue
+            reached[neighbor] = (movie, person, depth + 1)
+            heapq.heappush(frontier, (depth + 1 + bound, depth + 1, neighbor))
+
+    return None
+
+
+def check_deadline(deadline):
+    """
+    Raises TimeoutError once a time.monotonic() deadline has passed.
+    """
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError("search timed out")
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the (movie_id, person_id) path through a meeting person
+    from the parent maps of a bidirectional search.
+    """
+    solution = []
+    person_id = meeting
+    while forward[person_id][1] is not None:
+        movie_id, parent, _ = forward[person_id]
+        solution.append((movie_id, person_id))
+        person_id = parent
+    solution.reverse()
+
+    person_id = meeting
+    while backward[person_id][1] is not None:
+        movie_id, parent, _ = backward[person_id]
+        solution.append((movie_id, parent))
+        person_id = parent
+    return solution
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
+    global last_lookup
+    last_lookup = name
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
@@ -146,11 +451,51 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def search_names(query, k=10):
+    """
+    Returns up to k lowercase names matching a query by prefix,
+    then by trigram similarity.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index.search(query, k)
+
+
+def not_found_message():
+    """
+    Returns the "Person not found" message, with suggestions for the
+    last name looked up if there are any.
+    """
+    if last_lookup is None:
+        return "Person not found."
+    suggestions = search_names(last_lookup, 5)
+    if not suggestions:
+        return "Person not found."
+    return "Person not found. Did you mean: " + ", ".join(suggestions) + "?"
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if neighbor_cache is None:
+        return expand_neighbors(person_id)
+    neighbors = neighbor_cache.get(person_id)
+    if neighbors is None:
+        neighbors = frozenset(expand_neighbors(person_id))
+        neighbor_cache.put(person_id, neighbors)
+    return neighbors
+
+
+def expand_neighbors(person_id):
+    """
+    Computes (movie_id, person_id) pairs for people who starred with a
+    given person, bypassing the neighbor cache.
+    """
+    if graph is not None:
+        return graph.neighbors(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,370 @@
+"""
+Incremental updates to a loaded degrees dataset.
+
+A delta is a directory holding any of people.csv, movies.csv and
+stars.csv in the usual format, with an extra leading "op" column that
+is "+" to add (or update) a row and "-" to remove it. Removing a person
+or movie also removes their star rows.
+"""
+
+import csv
+import os
+from array import array
+
+from graph import REMOVED, CompactGraph, edit_order, splice_csr
+
+DELTA_COLUMNS = {
+    "people.csv": ("id", "name", "birth"),
+    "movies.csv": ("id", "title", "year"),
+    "stars.csv": ("person_id", "movie_id")
+}
+
+
+class Delta():
+    def __init__(self):
+        self.people_added = []
+        self.people_removed = []
+        self.movies_added = []
+        self.movies_removed = []
+        self.stars_added = []
+        self.stars_removed = []
+
+    @classmethod
+    def read(cls, directory):
+        """
+        Read a delta directory. Missing files mean no changes.
+        """
+        delta = cls()
+        targets = {
+            "people.csv": (delta.people_added, delta.people_removed),
+            "movies.csv": (delta.movies_added, delta.movies_removed),
+            "stars.csv": (delta.stars_added, delta.stars_removed)
+        }
+        for filename, (added, removed) in targets.items():
+            path = os.path.join(directory, filename)
+            if not os.path.exists(path):
+                continue
+            columns = DELTA_COLUMNS[filename]
+            with open(path, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    values = tuple(row[column] for column in columns)
+                    if row["op"] == "+":
+                        added.append(values)
+                    elif row["op"] == "-":
+                        removed.append(values)
+                    else:
+                        raise ValueError(
+                            f"{path}: op must be + or -, not {row['op']!r}")
+        return delta
+
+
+class DeltaResult():
+    """
+    What a delta changed: the people whose neighbors changed, the
+    co-star pairs that were added or removed, whether any names
+    changed, and for compact graphs the new graph and the array mapping
+    old to new person indices (REMOVED for removed people), or None if
+    no one was removed.
+    """
+
+    def __init__(self):
+        self.affected = set()
+        self.pairs_added = set()
+        self.pairs_removed = set()
+        self.names_changed = False
+        self.graph = None
+        self.remap = None
+
+
+def record(result, person_id, stars, added):
+    """
+    Record a star row change for a person in a movie with `stars`.
+    """
+    result.affected.add(person_id)
+    result.affected.update(stars)
+    pairs = result.pairs_added if added else result.pairs_removed
+    for star in stars:
+        if star != person_id:
+            pairs.add((person_id, star))
+
+
+def apply_to_dicts(delta, names, people, movies):
+    """
+    Apply a delta in place to the dict backend's names, people and
+    movies. Returns a DeltaResult.
+    """
+    result = DeltaResult()
+
+    def unlink(person_id, movie_id):
+        if movie_id in people[person_id]["movies"]:
+            people[person_id]["movies"].discard(movie_id)
+            movies[movie_id]["stars"].discard(person_id)
+            record(result, person_id, movies[movie_id]["stars"], False)
+
+    def forget_name(person_id, name):
+        ids = names.get(name.lower())
+        if ids is not None:
+            ids.discard(person_id)
+            if not ids:
+                del names[name.lower()]
+
+    for person_id, *_ in delta.people_removed:
+        if person_id in people:
+            for movie_id in list(people[person_id]["movies"]):
+                unlink(person_id, movie_id)
+            forget_name(person_id, people.pop(person_id)["name"])
+            result.names_changed = True
+    for movie_id, *_ in delta.movies_removed:
+        if movie_id in movies:
+            stars = movies.pop(movie_id)["stars"]
+            for person_id in stars:
+                people[person_id]["movies"].discard(movie_id)
+                record(result, person_id, stars, False)
+    for person_id, movie_id in delta.stars_removed:
+        if person_id in people and movie_id in movies:
+            unlink(person_id, movie_id)
+
+    for person_id, name, birth in delta.people_added:
+        if person_id in people:
+            forget_name(person_id, people[person_id]["name"])
+            people[person_id].update(name=name, birth=birth)
+        else:
+            people[person_id] = {"name": name, "birth": birth,
+                                 "movies": set()}
+        names.setdefault(name.lower(), set()).add(person_id)
+        result.names_changed = True
+    for movie_id, title, year in delta.movies_added:
+        if movie_id in movies:
+            movies[movie_id].update(title=title, year=year)
+        else:
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+    for person_id, movie_id in delta.stars_added:
+        if (person_id in people and movie_id in movies
+                and movie_id not in people[person_id]["movies"]):
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+            record(result, person_id, movies[movie_id]["stars"], True)
+    return result
+
+
+class TableEdit():
+    """
+    Pending changes to the people or the movies of a CompactGraph: old
+    rows removed, old rows updated in place and new rows appended.
+    """
+
+    def __init__(self, ids, lookup):
+        self.ids = ids
+        self.lookup = lookup
+        # Old indices of IDs already looked up or decoded
+        self.known = {}
+        self.removed = set()
+        self.updated = {}
+        self.appended = {}
+        self.remap = None
+        self.survivors = len(ids)
+        self.new_index = {}
+
+    def find(self, row_id):
+        """
+        Returns the old index of a row ID, or None.
+        """
+        if row_id not in self.known:
+            self.known[row_id] = self.lookup(row_id)
+        return self.known[row_id]
+
+    def exists(self, row_id):
+        return row_id in self.appended or (
+            self.find(row_id) is not None
+            and self.find(row_id) not in self.removed)
+
+    def remove(self, row_id):
+        """
+        Remove an existing row. Returns its old index, or None if it
+        does not exist.
+        """
+        old = self.find(row_id)
+        if old is None or old in self.removed:
+            return None
+        self.removed.add(old)
+        self.updated.pop(old, None)
+        return old
+
+    def add(self, row):
+        old = self.find(row[0])
+        if old is not None and old not in self.removed:
+            self.updated[old] = row
+        else:
+            self.appended[row[0]] = row
+
+    def finish(self):
+        """
+        Number the rows: survivors keep their relative order and
+        appended rows follow them.
+        """
+        count = len(self.ids)
+        if self.removed:
+            self.remap = array("I", [REMOVED]) * count
+            new = 0
+            for old in range(count):
+                if old not in self.removed:
+                    self.remap[old] = new
+                    new += 1
+            self.survivors = new
+        self.new_index = {row_id: self.survivors + i
+                          for i, row_id in enumerate(self.appended)}
+
+    def index(self, row_id):
+        """
+        Returns the new index of a row ID, or None if it is gone.
+        """
+        if row_id in self.new_index:
+            return self.new_index[row_id]
+        old = self.find(row_id)
+        if old is None or old in self.removed:
+            return None
+        return old if self.remap is None else self.remap[old]
+
+    def column(self, table, i):
+        """
+        Returns the edited StringTable of the i-th column.
+        """
+        return table.edited(
+            self.removed,
+            {old: row[i] for old, row in self.updated.items()
+             if row[i] != table[old]},
+            [row[i] for row in self.appended.values()])
+
+
+def apply_to_graph(graph, delta):
+    """
+    Build a new CompactGraph from an existing one plus a delta, without
+    re-reading any CSV files. Surviving people and movies keep their
+    relative order and new ones are appended, so old indices map onto
+    new ones through result.remap (an array holding REMOVED for removed
+    people, or None if no one was removed). Only the rows of people and
+    movies the delta touches are rebuilt: other CSR rows and strings
+    are copied from the old arrays as slices. Returns a DeltaResult.
+    """
+    result = DeltaResult()
+    people = TableEdit(graph.person_ids, graph.person_index)
+    movies = TableEdit(graph.movie_ids, graph.movie_index)
+
+    # Movie IDs of touched people and star IDs of touched movies
+    roles = {}
+    stars = {}
+
+    def roles_of(person_id):
+        if person_id not in roles:
+            roles[person_id] = set()
+            person = people.find(person_id)
+            if person is not None:
+                for movie in graph.movies_of(person):
+                    movie_id = graph.movie_ids[movie]
+                    movies.known[movie_id] = movie
+                    roles[person_id].add(movie_id)
+        return roles[person_id]
+
+    def stars_of(movie_id):
+        if movie_id not in stars:
+            stars[movie_id] = set()
+            movie = movies.find(movie_id)
+            if movie is not None:
+                for person in graph.stars_of(movie):
+                    person_id = graph.person_ids[person]
+                    people.known[person_id] = person
+                    stars[movie_id].add(person_id)
+        return stars[movie_id]
+
+    for person_id, *_ in delta.people_removed:
+        if people.remove(person_id) is not None:
+            result.names_changed = True
+            for movie_id in roles_of(person_id):
+                movie_stars = stars_of(movie_id)
+                movie_stars.discard(person_id)
+                record(result, person_id, movie_stars, False)
+            roles[person_id] = set()
+    for movie_id, *_ in delta.movies_removed:
+        if movies.remove(movie_id) is not None:
+            movie_stars = stars_of(movie_id)
+            for person_id in movie_stars:
+                roles_of(person_id).discard(movie_id)
+                record(result, person_id, movie_stars, False)
+            stars[movie_id] = set()
+    for person_id, movie_id in delta.stars_removed:
+        if (people.exists(person_id) and movies.exists(movie_id)
+                and person_id in stars_of(movie_id)):
+            stars_of(movie_id).discard(person_id)
+            roles_of(person_id).discard(movie_id)
+            record(result, person_id, stars_of(movie_id), False)
+
+    for row in delta.people_added:
+        people.add(row)
+        result.names_changed = True
+    for row in delta.movies_added:
+        movies.add(row)
+    for person_id, movie_id in delta.stars_added:
+        if (people.exists(person_id) and movies.exists(movie_id)
+                and person_id not in stars_of(movie_id)):
+            stars_of(movie_id).add(person_id)
+            roles_of(person_id).add(movie_id)
+            record(result, person_id, stars_of(movie_id), True)
+
+    people.finish()
+    movies.finish()
+
+    def rows(edit, touched, index):
+        """
+        Returns (replaced, appended) CSR rows for touched IDs, as sorted
+        lists of new neighbor indices.
+        """
+        replaced = {}
+        appended = [[] for _ in edit.appended]
+        for row_id, neighbor_ids in touched.items():
+            new = edit.index(row_id)
+            if new is None:
+                continue
+            row = sorted(index(n) for n in neighbor_ids)
+            if new >= edit.survivors:
+                appended[new - edit.survivors] = row
+            else:
+                replaced[edit.find(row_id)] = row
+        return replaced, appended
+
+    replaced, appended = rows(people, roles, movies.index)
+    person_offsets, person_movies = splice_csr(
+        graph.person_offsets, graph.person_movies, people.removed,
+        replaced, appended, movies.remap)
+    replaced, appended = rows(movies, stars, people.index)
+    movie_offsets, movie_stars = splice_csr(
+        graph.movie_offsets, graph.movie_stars, movies.removed,
+        replaced, appended, people.remap)
+
+    person_ids = people.column(graph.person_ids, 0)
+    person_names = people.column(graph.person_names, 1)
+    movie_ids = movies.column(graph.movie_ids, 0)
+    renamed = {old for old, row in people.updated.items()
+               if row[1] != graph.person_names[old]}
+    new_people = list(people.new_index.values())
+
+    def name_key(person):
+        return person_names[person].lower(), person
+
+    result.graph = CompactGraph(
+        person_ids, person_names, people.column(graph.person_births, 2),
+        movie_ids, movies.column(graph.movie_titles, 1),
+        movies.column(graph.movie_years, 2),
+        person_offsets, person_movies, movie_offsets, movie_stars,
+        person_order=edit_order(graph.person_order, people.remap, (),
+                                new_people, person_ids.__getitem__),
+        movie_order=edit_order(graph.movie_order, movies.remap, (),
+                               list(movies.new_index.values()),
+                               movie_ids.__getitem__),
+        name_order=edit_order(
+            graph.name_order, people.remap, renamed,
+            new_people + [old if people.remap is None else people.remap[old]
+                          for old in renamed],
+            name_key)
+    )
+    result.remap = people.remap
+    return result
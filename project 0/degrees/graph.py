@@ -0,0 +1,428 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+from ingest import read_people_and_movies, read_stars
+
+# Index remap entry for a removed row
+REMOVED = 0xFFFFFFFF
+
+
+class StringTable():
+    """
+    Immutable sequence of strings packed into a single UTF-8 blob,
+    indexed by an array of byte offsets.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, strings):
+        offsets = array("Q", [0])
+        parts = []
+        position = 0
+        for string in strings:
+            encoded = string.encode("utf-8")
+            parts.append(encoded)
+            position += len(encoded)
+            offsets.append(position)
+        return cls(b"".join(parts), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start = self.offsets[index]
+        end = self.offsets[index + 1]
+        return str(self.blob[start:end], "utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def edited(self, removed=(), replaced=None, appended=()):
+        """
+        Returns a new table without the `removed` indices, with the
+        strings of `replaced` (index -> string) swapped in and the
+        `appended` strings added at the end. Runs of unchanged strings
+        are copied as byte slices, without decoding them.
+        """
+        replaced = replaced or {}
+        parts = []
+        offsets = array("Q", [0])
+        position = 0
+
+        def copy(start, end):
+            nonlocal position
+            if start >= end:
+                return
+            low, high = self.offsets[start], self.offsets[end]
+            parts.append(self.blob[low:high])
+            shift = position - low
+            if shift == 0:
+                offsets.frombytes(
+                    memoryview(self.offsets[start + 1:end + 1]).cast("B"))
+            else:
+                offsets.extend(array("Q", [
+                    offset + shift
+                    for offset in self.offsets[start + 1:end + 1]]))
+            position += high - low
+
+        def put(string):
+            nonlocal position
+            encoded = string.encode("utf-8")
+            parts.append(encoded)
+            position += len(encoded)
+            offsets.append(position)
+
+        start = 0
+        for index in sorted(set(removed) | replaced.keys()):
+            copy(start, index)
+            if index in replaced:
+                put(replaced[index])
+            start = index + 1
+        copy(start, len(self))
+        for string in appended:
+            put(string)
+        return StringTable(b"".join(parts), offsets)
+
+
+def csr(count, sources, targets):
+    """
+    Returns (offsets, neighbors) arrays of a compressed sparse row
+    adjacency built from parallel arrays of edge sources and targets.
+    """
+    offsets = array("I", bytes(4 * (count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    fill = array("I", offsets[:-1])
+    neighbors = array("I", bytes(4 * len(sources)))
+    for source, target in zip(sources, targets):
+        neighbors[fill[source]] = target
+        fill[source] += 1
+    return offsets, neighbors
+
+
+def splice_csr(offsets, neighbors, removed=(), replaced=None, appended=(),
+               translate=None):
+    """
+    Returns new (offsets, neighbors) CSR arrays from existing ones,
+    without the `removed` rows, with the rows of `replaced` (old row ->
+    neighbor list) swapped in and the `appended` rows added at the end.
+    Runs of unchanged rows are copied as slices, their neighbors passed
+    through the `translate` array if given.
+    """
+    replaced = replaced or {}
+    new_offsets = array("I", [0])
+    new_neighbors = array("I")
+
+    def copy(start, end):
+        if start >= end:
+            return
+        low, high = offsets[start], offsets[end]
+        if translate is None:
+            new_neighbors.frombytes(memoryview(neighbors[low:high]).cast("B"))
+        else:
+            new_neighbors.extend(
+                array("I", map(translate.__getitem__, neighbors[low:high])))
+        shift = new_offsets[-1] - low
+        if shift == 0:
+            new_offsets.frombytes(
+                memoryview(offsets[start + 1:end + 1]).cast("B"))
+        else:
+            new_offsets.extend(array("I", [
+                offset + shift for offset in offsets[start + 1:end + 1]]))
+
+    def put(row):
+        new_neighbors.extend(array("I", row))
+        new_offsets.append(len(new_neighbors))
+
+    start = 0
+    for row in sorted(set(removed) | replaced.keys()):
+        copy(start, row)
+        if row in replaced:
+            put(replaced[row])
+        start = row + 1
+    copy(start, len(offsets) - 1)
+    for row in appended:
+        put(row)
+    return new_offsets, new_neighbors
+
+
+def edit_order(order, remap, dropped, inserted, key):
+    """
+    Returns a permutation array sorted by `key` from an existing one:
+    old indices are mapped through the `remap` array (None when nothing
+    moved), those in `dropped` or mapped to REMOVED are left out, and
+    the new indices `inserted` are placed by key.
+    """
+    if remap is None and not dropped:
+        edited = array("I", order)
+    else:
+        edited = array("I")
+        for index in order:
+            new = index if remap is None else remap[index]
+            if new != REMOVED and index not in dropped:
+                edited.append(new)
+
+    if len(inserted) > len(edited) // 8:
+        edited.extend(inserted)
+        return array("I", sorted(edited, key=key))
+    for index in inserted:
+        edited.insert(bisect_right(edited, key(index), key=key), index)
+    return edited
+
+
+class CompactGraph():
+    """
+    Star graph with person and movie IDs interned to dense integers.
+
+    People and movies are stored as string tables, and the bipartite
+    person-movie graph as two CSR adjacencies (person -> movies and
+    movie -> stars) of 4-byte indices.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_order=None, movie_order=None, name_order=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Permutations sorted by ID and by lowercase name, for lookups
+        if person_order is None:
+            person_order = array("I", sorted(
+                range(len(person_ids)), key=person_ids.__getitem__))
+        if movie_order is None:
+            movie_order = array("I", sorted(
+                range(len(movie_ids)), key=movie_ids.__getitem__))
+        if name_order is None:
+            name_order = array("I", sorted(
+                range(len(person_names)), key=self.name_key))
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+
+        # Per-file IngestStats when loaded from CSV files
+        self.ingest_stats = []
+
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+        self.names = NamesView(self)
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Load a compact graph from the people, movies and stars CSV files.
+        """
+        people, movies, stats = read_people_and_movies(directory)
+        person_ids, person_names, person_births = (
+            [row[i] for row in people] for i in range(3))
+        movie_ids, movie_titles, movie_years = (
+            [row[i] for row in movies] for i in range(3))
+        del people, movies
+
+        # Temporary maps used only while interning the star edges
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        edges = set()
+        star_rows, star_stats = read_stars(directory)
+        for person_id, movie_id in star_rows:
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is None or movie is None:
+                star_stats.dropped += 1
+                continue
+            edges.add(person * len(movie_ids) + movie)
+        stats.append(star_stats)
+        del person_index, movie_index
+
+        graph = cls.from_edges(
+            person_ids, person_names, person_births,
+            movie_ids, movie_titles, movie_years,
+            sorted(edges)
+        )
+        graph.ingest_stats = stats
+        return graph
+
+    @classmethod
+    def from_edges(cls, person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years, edges):
+        """
+        Build a compact graph from people and movie columns and an
+        iterable of packed `person * len(movie_ids) + movie` edges.
+        """
+        people = array("I")
+        stars = array("I")
+        for edge in edges:
+            person, movie = divmod(edge, len(movie_ids))
+            people.append(person)
+            stars.append(movie)
+
+        person_offsets, person_movies = csr(len(person_ids), people, stars)
+        movie_offsets, movie_stars = csr(len(movie_ids), stars, people)
+        return cls(
+            StringTable.build(person_ids),
+            StringTable.build(person_names),
+            StringTable.build(person_births),
+            StringTable.build(movie_ids),
+            StringTable.build(movie_titles),
+            StringTable.build(movie_years),
+            person_offsets, person_movies, movie_offsets, movie_stars
+        )
+
+    def name_key(self, person):
+        return self.person_names[person].lower()
+
+    def person_index(self, person_id):
+        """
+        Returns the integer index for a person ID, or None.
+        """
+        return self._find(self.person_ids, self.person_order, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer index for a movie ID, or None.
+        """
+        return self._find(self.movie_ids, self.movie_order, movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the integer indices of all people with a given
+        (case-insensitive) name.
+        """
+        key = name.lower()
+        start = bisect_left(self.name_order, key, key=self.name_key)
+        end = bisect_right(self.name_order, key, lo=start, key=self.name_key)
+        return self.name_order[start:end]
+
+    @staticmethod
+    def _find(table, order, key):
+        i = bisect_left(order, key, key=table.__getitem__)
+        if i < len(order) and table[order[i]] == key:
+            return order[i]
+        return None
+
+    def movies_of(self, person):
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbor_indices(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred with
+        a given person index.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        person = self.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            (self.movie_ids[movie], self.person_ids[star])
+            for movie, star in self.neighbor_indices(person)
+        }
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` mapping over a compact graph, producing the same
+    {name, birth, movies} dictionaries as the dict backend on demand.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` mapping over a compact graph, producing the same
+    {title, year, stars} dictionaries as the dict backend on demand.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` mapping from lowercase names to sets of person IDs.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        person_ids = {graph.person_ids[p] for p in graph.people_named(name)}
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self.graph.name_key(person)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
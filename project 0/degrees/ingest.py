@@ -0,0 +1,100 @@
+"""
+Streaming CSV ingestion for the degrees data files.
+
+Rows are read through a large buffer with csv.reader, only the needed
+columns are picked out by position, and each file's row count, dropped
+rows and throughput are recorded in an IngestStats.
+"""
+
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+BUFFER_SIZE = 1 << 20
+
+PEOPLE_COLUMNS = ("id", "name", "birth")
+MOVIE_COLUMNS = ("id", "title", "year")
+STAR_COLUMNS = ("person_id", "movie_id")
+
+
+class IngestStats():
+    def __init__(self, filename):
+        self.filename = filename
+        self.rows = 0
+        self.dropped = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+    def __repr__(self):
+        return (f"{self.filename}: {self.rows} rows, {self.dropped} dropped, "
+                f"{self.seconds:.3f}s ({self.rows_per_second:.0f} rows/s)")
+
+
+def read_columns(path, columns, stats):
+    """
+    Yields a tuple of the named columns for each row of a CSV file.
+    Rows too short to hold every column are counted as dropped.
+    """
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", newline="",
+              buffering=BUFFER_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        try:
+            positions = [header.index(column) for column in columns]
+        except ValueError:
+            raise ValueError(f"{path} must have columns {', '.join(columns)}")
+        width = max(positions) + 1
+        pick = itemgetter(*positions)
+
+        rows = 0
+        dropped = 0
+        for row in reader:
+            rows += 1
+            if len(row) < width:
+                dropped += 1
+                continue
+            yield pick(row)
+        stats.rows += rows
+        stats.dropped += dropped
+    stats.seconds += time.perf_counter() - start
+
+
+def read_table(path, columns):
+    """
+    Returns (rows, stats) for a whole CSV file.
+    """
+    stats = IngestStats(path.rsplit("/", 1)[-1])
+    return list(read_columns(path, columns, stats)), stats
+
+
+def read_people_and_movies(directory, parallel=True):
+    """
+    Returns (people_rows, movie_rows, stats) for a data directory,
+    reading people.csv and movies.csv concurrently by default.
+    """
+    jobs = [(f"{directory}/people.csv", PEOPLE_COLUMNS),
+            (f"{directory}/movies.csv", MOVIE_COLUMNS)]
+    if parallel:
+        with ThreadPoolExecutor(2) as executor:
+            futures = [executor.submit(read_table, *job) for job in jobs]
+            (people, people_stats), (movies, movie_stats) = [
+                future.result() for future in futures]
+    else:
+        (people, people_stats), (movies, movie_stats) = [
+            read_table(*job) for job in jobs]
+    return people, movies, [people_stats, movie_stats]
+
+
+def read_stars(directory):
+    """
+    Returns a (rows, stats) pair where rows streams (person_id,
+    movie_id) tuples from stars.csv. Callers add rows they reject to
+    stats.dropped.
+    """
+    stats = IngestStats("stars.csv")
+    return read_columns(f"{directory}/stars.csv", STAR_COLUMNS, stats), stats
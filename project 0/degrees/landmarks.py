@@ -0,0 +1,221 @@
+"""
+Landmark distance oracle for the compact degrees graph.
+
+Stores the BFS distance from each of k landmark people to every person
+as one byte per person, and answers lower and upper bounds on the
+distance between any two people from the triangle inequality:
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+The lower bound is also a consistent heuristic for A* search.
+"""
+
+import math
+import struct
+from array import array
+from collections import deque
+
+from graph import REMOVED
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+MAGIC = b"DEGLMK1\0"
+HEADER = struct.Struct("<8sII")
+
+
+def bfs_distances(graph, source):
+    """
+    Returns a byte array of person-hop distances from a person index
+    to every person, UNREACHABLE for those not connected. Distances
+    beyond 254 are clamped to 254, which keeps every bound valid.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph.person_ids)
+    distances[source] = 0
+    queue = deque([source])
+    while queue:
+        person = queue.popleft()
+        depth = min(distances[person] + 1, UNREACHABLE - 1)
+        for movie in graph.movies_of(person):
+            for star in graph.stars_of(movie):
+                if distances[star] == UNREACHABLE:
+                    distances[star] = depth
+                    queue.append(star)
+    return distances
+
+
+class LandmarkOracle():
+    def __init__(self, graph, landmarks, rows):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.rows = rows
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Pick k landmarks and run a BFS from each. The first landmark is
+        the person in the most movies; each next one is the person
+        farthest from all landmarks chosen so far, among those
+        connected to them, so landmarks spread across the graph.
+        """
+        count = len(graph.person_ids)
+        if count == 0:
+            return cls(graph, [], [])
+        offsets = graph.person_offsets
+        landmark = max(range(count), key=lambda p: offsets[p + 1] - offsets[p])
+
+        landmarks = []
+        rows = []
+        nearest = array("B", [UNREACHABLE]) * count
+        for _ in range(min(k, count)):
+            landmarks.append(landmark)
+            row = bfs_distances(graph, landmark)
+            rows.append(row)
+            for person, distance in enumerate(row):
+                if distance < nearest[person]:
+                    nearest[person] = distance
+
+            # Farthest connected person, or an unreached one if all are 0
+            landmark = max(range(count), key=lambda p: (
+                nearest[p] if nearest[p] != UNREACHABLE else -1))
+            if nearest[landmark] == 0:
+                unreached = [p for p in range(count)
+                             if nearest[p] == UNREACHABLE]
+                if not unreached:
+                    break
+                landmark = unreached[0]
+        return cls(graph, landmarks, rows)
+
+    def save(self, path):
+        """
+        Write landmarks and distance rows to a file.
+        """
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(self.landmarks),
+                                len(self.graph.person_ids)))
+            f.write(array("I", self.landmarks).tobytes())
+            for row in self.rows:
+                f.write(row.tobytes())
+
+    @classmethod
+    def load(cls, path, graph):
+        """
+        Read an oracle written by save for the same graph.
+        """
+        with open(path, "rb") as f:
+            magic, k, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError("not a landmark oracle file")
+            if count != len(graph.person_ids):
+                raise ValueError("oracle was built for a different graph")
+            landmarks = array("I")
+            landmarks.frombytes(f.read(4 * k))
+            rows = []
+            for _ in range(k):
+                row = array("B")
+                row.frombytes(f.read(count))
+                rows.append(row)
+        return cls(graph, list(landmarks), rows)
+
+    def index(self, person_id):
+        person = self.graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return person
+
+    def bounds(self, source_id, target_id):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two people. Both are math.inf if a landmark shows they
+        are not connected; upper is math.inf if no landmark reaches both.
+        """
+        source = self.index(source_id)
+        target = self.index(target_id)
+        if source == target:
+            return 0, 0
+        lower = 1
+        upper = math.inf
+        for row in self.rows:
+            s, t = row[source], row[target]
+            if s == UNREACHABLE and t == UNREACHABLE:
+                continue
+            if s == UNREACHABLE or t == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(s - t))
+            if max(s, t) < UNREACHABLE - 1:
+                upper = min(upper, s + t)
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving, for a person index, a lower bound on
+        its distance to the target person index (math.inf if it cannot
+        reach the target).
+        """
+        columns = [(row, row[target]) for row in self.rows]
+
+        def estimate(person):
+            if person == target:
+                return 0
+            best = 1
+            for row, t in columns:
+                p = row[person]
+                if p == UNREACHABLE and t == UNREACHABLE:
+                    continue
+                if p == UNREACHABLE or t == UNREACHABLE:
+                    return math.inf
+                if abs(p - t) > best:
+                    best = abs(p - t)
+            return best
+
+        return estimate
+
+    def update(self, result):
+        """
+        Bring the oracle up to date after a delta (a delta.DeltaResult
+        for this oracle's graph). Rows are moved to the new person
+        indices, and only landmarks whose distances a changed co-star
+        pair could affect are recomputed: an added pair (u, v) matters
+        if d(L, u) and d(L, v) differ by more than one, a removed pair
+        if they differ by exactly one. Returns the number of rows
+        recomputed.
+        """
+        graph = result.graph or self.graph
+        stale = set()
+        removed = [(self.graph.person_index(u), self.graph.person_index(v))
+                   for u, v in result.pairs_removed]
+        for i, row in enumerate(self.rows):
+            if any(abs(row[u] - row[v]) == 1 for u, v in removed):
+                stale.add(i)
+
+        if result.graph is not None:
+            count = len(graph.person_ids)
+            for i, row in enumerate(self.rows):
+                if result.remap is None:
+                    # No one removed: new people are appended
+                    row.extend(array("B", [UNREACHABLE]) * (count - len(row)))
+                    continue
+                moved = array("B", [UNREACHABLE]) * count
+                for old, new in enumerate(result.remap):
+                    if new != REMOVED:
+                        moved[new] = row[old]
+                self.rows[i] = moved
+                landmark = result.remap[self.landmarks[i]]
+                if landmark == REMOVED:
+                    # Landmark removed: replace it with its best survivor
+                    landmark = max(range(count), key=lambda p: (
+                        moved[p] != UNREACHABLE, -moved[p]), default=None)
+                    stale.add(i)
+                self.landmarks[i] = landmark
+            self.graph = graph
+
+        added = [(graph.person_index(u), graph.person_index(v))
+                 for u, v in result.pairs_added]
+        for i, row in enumerate(self.rows):
+            if any(abs(row[u] - row[v]) > 1 for u, v in added):
+                stale.add(i)
+
+        for i in stale:
+            if self.landmarks[i] is not None:
+                self.rows[i] = bfs_distances(graph, self.landmarks[i])
+        return len(stale)
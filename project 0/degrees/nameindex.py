@@ -0,0 +1,214 @@
+"""
+Prefix and fuzzy search over lowercase person names.
+
+Prefix queries binary-search a sorted list of names. Fuzzy queries
+score names by the trigrams they share with the query, using an
+inverted index from trigram to name positions.
+
+    python nameindex.py DIRECTORY    # fuzzy recall on misspelled names
+"""
+
+import argparse
+import csv
+import heapq
+import random
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+from string import ascii_lowercase
+
+# Fuzzy search keeps the names within MAX_EDITS edits of the query as
+# candidates, as long as the posting lists that takes reading hold at
+# most POSTINGS_BUDGET names. It counts the query trigrams they share
+# over every list of at most POSTINGS_CAP names (longer ones are very
+# common trigrams), probing lists PROBE_COST times longer than the
+# candidate set instead of scanning them, and scores the RESCORE
+# best-sharing candidates exactly.
+MAX_EDITS = 1
+POSTINGS_BUDGET = 4000
+POSTINGS_CAP = 10000
+PROBE_COST = 16
+RESCORE = 20
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams in a name, padded so that word starts
+    and ends form their own trigrams.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    def __init__(self, names):
+        self.keys = sorted({name.lower() for name in names})
+        self.sizes = array("H")
+        postings = {}
+        for position, key in enumerate(self.keys):
+            grams = trigrams(key)
+            self.sizes.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                postings.setdefault(gram, array("I")).append(position)
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.keys)
+
+    def prefix(self, prefix, k=10):
+        """
+        Returns up to k names starting with a prefix, in sorted order.
+        """
+        prefix = prefix.lower()
+        results = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(results) < k:
+            if not self.keys[i].startswith(prefix):
+                break
+            results.append(self.keys[i])
+            i += 1
+        return results
+
+    def fuzzy(self, query, k=10):
+        """
+        Returns up to k (score, name) pairs most similar to a query,
+        best first, scored by the Dice coefficient of their trigrams.
+        """
+        grams = trigrams(query.lower())
+        lists = sorted(
+            (self.postings[gram] for gram in grams if gram in self.postings),
+            key=len
+        )
+        if not lists:
+            return []
+
+        # T-occurrence filter: a name within MAX_EDITS edits of the
+        # query lacks at most 4 * MAX_EDITS of its trigrams (swapping
+        # two letters changes four), fewer for each query trigram no
+        # name has, so it is in all but `misses` of the lists: in one
+        # of the `misses + 1` shortest, in two of the shortest
+        # `misses + 2`, and so on. Fewer misses are allowed when the
+        # shortest lists hold more than POSTINGS_BUDGET names.
+        misses = max(0, 4 * MAX_EDITS - (len(grams) - len(lists)))
+        while misses and sum(map(len, lists[:misses + 1])) > POSTINGS_BUDGET:
+            misses -= 1
+        shared = Counter(chain.from_iterable(lists[:misses + 1]))
+
+        # Count the longer lists, dropping names that can no longer
+        # pass while k names are left. Lists longer than POSTINGS_CAP
+        # are only checked for the final candidates.
+        skipped = []
+        for seen, postings in enumerate(lists[misses + 1:], misses + 2):
+            if len(postings) > POSTINGS_CAP:
+                skipped.append(postings)
+                continue
+            if len(shared) * PROBE_COST < len(postings):
+                found = [position for position in shared
+                         if contains(postings, position)]
+            else:
+                found = shared.keys() & postings
+            shared.update(found)
+            needed = seen - misses - len(skipped)
+            kept = {position: count for position, count in shared.items()
+                    if count >= needed}
+            if len(kept) >= k:
+                shared = Counter(kept)
+            else:
+                # Too strict for this query: allow one more miss
+                misses += 1
+
+        # Rank by count, then rescore the best with the skipped lists
+        candidates = heapq.nlargest(
+            RESCORE, shared.items(),
+            key=lambda item: item[1] / (len(grams) + self.sizes[item[0]])
+        )
+        scored = []
+        for position, count in candidates:
+            count += sum(contains(postings, position) for postings in skipped)
+            scored.append((2 * count / (len(grams) + self.sizes[position]),
+                           self.keys[position]))
+        return heapq.nsmallest(k, scored,
+                               key=lambda item: (-item[0], item[1]))
+
+    def search(self, query, k=10):
+        """
+        Returns up to k names for an autocomplete query: prefix matches
+        first, then fuzzy matches.
+        """
+        results = self.prefix(query, k)
+        if len(results) < k:
+            seen = set(results)
+            for _, name in self.fuzzy(query, k):
+                if name not in seen and len(results) < k:
+                    results.append(name)
+                    seen.add(name)
+        return results
+
+
+def contains(postings, position):
+    """
+    Returns True if a sorted posting list holds a name position.
+    """
+    i = bisect_left(postings, position)
+    return i < len(postings) and postings[i] == position
+
+
+def misspell(name, rng):
+    """
+    Returns a name with one random character substituted, inserted,
+    deleted or swapped with its neighbor.
+    """
+    i = rng.randrange(len(name))
+    edit = rng.randrange(4)
+    letter = rng.choice(ascii_lowercase)
+    if edit == 0:
+        return name[:i] + letter + name[i + 1:]
+    if edit == 1:
+        return name[:i] + letter + name[i:]
+    if edit == 2 and len(name) > 1:
+        return name[:i] + name[i + 1:]
+    if i < len(name) - 1:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name + letter
+
+
+def recall(index, queries=500, k=10, seed=0):
+    """
+    Returns the fraction of misspelled names whose correct spelling is
+    among the top k fuzzy matches, and the query latencies in seconds.
+    """
+    rng = random.Random(seed)
+    names = rng.sample(index.keys, min(queries, len(index.keys)))
+    found = 0
+    latencies = []
+    for name in names:
+        query = misspell(name, rng)
+        start = time.perf_counter()
+        matches = index.fuzzy(query, k)
+        latencies.append(time.perf_counter() - start)
+        found += any(match == name for _, match in matches)
+    return found / max(1, len(names)), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure fuzzy name search recall.")
+    parser.add_argument("directory")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(f"{args.directory}/people.csv", encoding="utf-8") as f:
+        index = NameIndex(row["name"] for row in csv.DictReader(f))
+    fraction, latencies = recall(index, args.queries, args.k, args.seed)
+    latencies.sort()
+    print(f"{len(index)} names, recall@{args.k} {fraction:.3f}, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
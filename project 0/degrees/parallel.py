@@ -0,0 +1,48 @@
+"""
+Multi-source BFS across a pool of worker processes.
+
+Each worker memory-maps the same read-only graph snapshot, so the
+graph is loaded once into the page cache and shared by every process.
+"""
+
+import heapq
+import multiprocessing
+import os
+
+import batch
+import degrees
+from snapshot import load_snapshot
+
+
+def attach(path):
+    """
+    Pool initializer: make the snapshot at `path` the worker's graph.
+    """
+    degrees.use_graph(load_snapshot(path))
+
+
+def answer(task):
+    source, targets = task
+    return batch.answer_source(source, targets)
+
+
+def run_parallel(snapshot, queries, workers=None):
+    """
+    Answers (source, target) queries like batch.run_batch, running
+    one BFS per distinct source in a pool of `workers` processes.
+    Yields results in query order: each is held back in a heap keyed
+    on its index until every earlier query has been answered.
+    """
+    workers = workers or os.cpu_count()
+    tasks = list(batch.group_by_source(queries).items())
+    chunksize = max(1, len(tasks) // (workers * 4))
+    pending = []
+    next_index = 0
+    with multiprocessing.Pool(workers, initializer=attach,
+                              initargs=(snapshot,)) as pool:
+        for results in pool.imap(answer, tasks, chunksize=chunksize):
+            for result in results:
+                heapq.heappush(pending, result)
+            while pending and pending[0][0] == next_index:
+                yield heapq.heappop(pending)
+                next_index += 1
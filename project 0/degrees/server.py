@@ -0,0 +1,260 @@
+"""
+Long-running degrees query service.
+
+Loads the graph once and answers JSON requests over HTTP or a Unix
+socket:
+
+    GET /path?source=...&target=...   shortest path between two people
+    GET /search?q=...&k=...           autocomplete over person names
+    GET /stats                        latency histograms and cache stats
+
+Sources and targets may be person IDs or unambiguous names.
+"""
+
+import argparse
+import functools
+import json
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import batch
+import degrees
+
+# Upper bounds of latency histogram buckets, in milliseconds
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000,
+           2500, 5000, 10000, float("inf"))
+
+
+class LatencyHistogram():
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, milliseconds):
+        with self.lock:
+            for i, bound in enumerate(BUCKETS):
+                if milliseconds <= bound:
+                    self.counts[i] += 1
+                    break
+            self.total += milliseconds
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding a percentile.
+        """
+        count = sum(self.counts)
+        if count == 0:
+            return None
+        seen = 0
+        for bound, bucket in zip(BUCKETS, self.counts):
+            seen += bucket
+            if seen >= fraction * count:
+                return bound
+        return BUCKETS[-1]
+
+    def summary(self):
+        with self.lock:
+            count = sum(self.counts)
+            buckets = {str(bound): bucket
+                       for bound, bucket in zip(BUCKETS, self.counts)
+                       if bucket}
+            mean = self.total / count if count else None
+        return {
+            "count": count,
+            "mean_ms": mean,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets
+        }
+
+
+class NotFound(LookupError):
+    """
+    Raised for requests naming a person that is not in the graph.
+    """
+
+
+class DegreesService():
+    """
+    Answers path and name-search queries against the loaded graph,
+    caching paths for repeated pairs and timing every request.
+    """
+
+    def __init__(self, timeout=10.0, cache_size=10000, threads=8):
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(threads)
+        self.histograms = {}
+        self.lock = threading.Lock()
+        # Deadline of the search running on each pool thread
+        self.local = threading.local()
+        self.cached_path = functools.lru_cache(maxsize=cache_size)(
+            self.find_path)
+
+    def find_path(self, source_id, target_id):
+        path = degrees.shortest_path(source_id, target_id, bidirectional=True,
+                                     deadline=self.local.deadline)
+        return tuple(path) if path is not None else None
+
+    def run_search(self, source_id, target_id, deadline):
+        self.local.deadline = deadline
+        return self.cached_path(source_id, target_id)
+
+    def histogram(self, endpoint):
+        with self.lock:
+            if endpoint not in self.histograms:
+                self.histograms[endpoint] = LatencyHistogram()
+            return self.histograms[endpoint]
+
+    def path(self, source, target):
+        """
+        Returns the path response for two people, raising NotFound if
+        either is unknown. Searches that exceed the timeout raise
+        TimeoutError; the search itself stops at the same deadline, so
+        it frees its pool thread instead of running on.
+        """
+        source_id = batch.resolve(source)
+        target_id = batch.resolve(target)
+        if source_id is None or target_id is None:
+            raise NotFound("person not found")
+
+        deadline = time.monotonic() + self.timeout
+        future = self.executor.submit(self.run_search, source_id, target_id,
+                                      deadline)
+        path = future.result(timeout=self.timeout)
+        if path is None:
+            return {"source": source_id, "target": target_id,
+                    "degrees": None, "path": None}
+        return {
+            "source": source_id,
+            "target": target_id,
+            "degrees": len(path),
+            "path": [
+                {"movie_id": movie_id,
+                 "title": degrees.movies[movie_id]["title"],
+                 "person_id": person_id,
+                 "name": degrees.people[person_id]["name"]}
+                for movie_id, person_id in path
+            ]
+        }
+
+    def search(self, query, k=10):
+        results = []
+        for name in degrees.search_names(query, k):
+            for person_id in sorted(degrees.names.get(name, ())):
+                person = degrees.people[person_id]
+                results.append({"person_id": person_id,
+                                "name": person["name"],
+                                "birth": person["birth"]})
+        return {"query": query, "results": results[:k]}
+
+    def stats(self):
+        cache = self.cached_path.cache_info()
+        with self.lock:
+            histograms = dict(self.histograms)
+        neighbors = degrees.cache_info()
+        return {
+            "latency": {endpoint: histogram.summary()
+                        for endpoint, histogram in histograms.items()},
+            "path_cache": cache._asdict(),
+            "neighbor_cache": neighbors._asdict() if neighbors else None
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        start = time.perf_counter()
+        try:
+            status, body = self.route(url.path, query)
+        except TimeoutError:
+            status, body = 504, {"error": "search timed out"}
+        except NotFound as e:
+            status, body = 404, {"error": str(e)}
+        except (KeyError, ValueError) as e:
+            status, body = 400, {"error": f"bad request: {e}"}
+        elapsed = (time.perf_counter() - start) * 1000
+        if status != 404:
+            self.service.histogram(url.path).record(elapsed)
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def route(self, path, query):
+        if path == "/path":
+            return 200, self.service.path(query["source"], query["target"])
+        elif path == "/search":
+            return 200, self.service.search(query["q"],
+                                            int(query.get("k", 10)))
+        elif path == "/stats":
+            return 200, self.service.stats()
+        return 404, {"error": "not found"}
+
+    def address_string(self):
+        # Unix socket clients have no host address
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "unix"
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn,
+                              socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries.")
+    parser.add_argument("directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", metavar="PATH",
+                        help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="seconds before a path search returns 504")
+    parser.add_argument("--cache", type=int, default=100000, metavar="SIZE",
+                        help="cache up to SIZE expanded neighbor sets")
+    parser.add_argument("--path-cache", type=int, default=10000,
+                        metavar="SIZE", help="cache up to SIZE path results")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the compact integer-indexed graph backend")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="memory-map the graph from a binary snapshot")
+    args = parser.parse_args()
+
+    if args.cache:
+        degrees.enable_neighbor_cache(args.cache)
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=args.compact,
+                      snapshot=args.snapshot)
+    degrees.search_names("")
+    print("Data loaded.")
+
+    Handler.service = DegreesService(timeout=args.timeout,
+                                     cache_size=args.path_cache)
+    if args.socket:
+        server = ThreadingUnixHTTPServer(args.socket, Handler)
+        print(f"Serving on {args.socket}.")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), Handler)
+        print(f"Serving on http://{args.host}:{args.port}.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
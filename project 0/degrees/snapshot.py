@@ -0,0 +1,179 @@
+"""
+Binary snapshots of a CompactGraph, memory-mapped on load.
+
+A snapshot is a small JSON header followed by the graph's arrays and
+string blobs, each aligned to 8 bytes. Loading maps the file read-only
+and casts memoryviews over it, so startup does no parsing and every
+process using the same snapshot shares its physical pages.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+from graph import CompactGraph, StringTable
+
+MAGIC = b"DEGSNAP1"
+HEADER = struct.Struct("<8sQ")
+ALIGNMENT = 8
+
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+TABLES = ("person_ids", "person_names", "person_births",
+          "movie_ids", "movie_titles", "movie_years")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "person_order", "movie_order", "name_order")
+
+
+class StaleSnapshotError(Exception):
+    pass
+
+
+def fingerprint(directory):
+    """
+    Returns the size and modification time of each CSV file in a
+    data directory, used to detect stale snapshots.
+    """
+    stats = {}
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        stats[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def has_sources(directory):
+    """
+    Returns True if every CSV file a snapshot is compiled from is in
+    `directory`.
+    """
+    return all(os.path.isfile(os.path.join(directory, filename))
+               for filename in CSV_FILES)
+
+
+def write_snapshot(graph, path, source=None):
+    """
+    Write a CompactGraph to a binary snapshot file. `source` is the
+    fingerprint of the CSV files the graph was loaded from, if any.
+    """
+    sections = []
+    for name in TABLES:
+        table = getattr(graph, name)
+        sections.append((f"{name}.blob", "B", table.blob))
+        sections.append((f"{name}.offsets", "Q", table.offsets))
+    for name in ARRAYS:
+        values = getattr(graph, name)
+        sections.append((name, memoryview(values).format, values))
+
+    # Lay out sections after the header, each aligned to 8 bytes
+    layout = {}
+    position = 0
+    for name, typecode, data in sections:
+        size = memoryview(data).nbytes
+        layout[name] = [position, size, typecode]
+        position += size + (-size % ALIGNMENT)
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "source": source,
+        "sections": layout
+    }).encode("utf-8")
+    header += b" " * (-(HEADER.size + len(header)) % ALIGNMENT)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, typecode, data in sections:
+            size = memoryview(data).nbytes
+            f.write(data)
+            f.write(b"\0" * (-size % ALIGNMENT))
+    os.replace(tmp_path, path)
+
+
+def read_header(f):
+    magic, length = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("not a degrees snapshot")
+    header = json.loads(f.read(length))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError("snapshot was written with a different byte order")
+    return HEADER.size + length, header
+
+
+def source_of(path):
+    """
+    Returns the CSV fingerprint a snapshot was compiled from, or None.
+    """
+    with open(path, "rb") as f:
+        _, header = read_header(f)
+    return header["source"]
+
+
+def is_stale(path, directory):
+    """
+    Returns True if a snapshot is missing or was not compiled from the
+    current CSV files in `directory`.
+    """
+    try:
+        with open(path, "rb") as f:
+            _, header = read_header(f)
+    except (OSError, ValueError):
+        return True
+    return header["source"] != fingerprint(directory)
+
+
+def load_snapshot(path, directory=None):
+    """
+    Memory-map a snapshot and return a CompactGraph backed by it.
+
+    If `directory` is given, raises StaleSnapshotError when the CSV
+    files there have changed since the snapshot was compiled.
+    """
+    with open(path, "rb") as f:
+        start, header = read_header(f)
+        if directory is not None and header["source"] != fingerprint(directory):
+            raise StaleSnapshotError(f"{path} is out of date with {directory}")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    sections = {}
+    for name, (offset, size, typecode) in header["sections"].items():
+        section = view[start + offset:start + offset + size]
+        sections[name] = section if typecode == "B" else section.cast(typecode)
+
+    tables = [
+        StringTable(sections[f"{name}.blob"], sections[f"{name}.offsets"])
+        for name in TABLES
+    ]
+    arrays = [sections[name] for name in ARRAYS]
+    graph = CompactGraph(*tables, *arrays)
+    graph.mapping = mapped
+    return graph
+
+
+def compile_snapshot(directory, path):
+    """
+    Load the CSV files in `directory` and write them to a snapshot.
+    """
+    source = fingerprint(directory)
+    graph = CompactGraph.from_csv(directory)
+    write_snapshot(graph, path, source=source)
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a degrees data directory to a binary snapshot.")
+    parser.add_argument("directory")
+    parser.add_argument("snapshot")
+    args = parser.parse_args()
+
+    print("Compiling snapshot...")
+    compile_snapshot(args.directory, args.snapshot)
+    print(f"Snapshot written to {args.snapshot}.")
+
+
+if __name__ == "__main__":
+    main()
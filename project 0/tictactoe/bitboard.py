@@ -0,0 +1,145 @@
+"""
+Tic Tac Toe engine on bitboards
+
+A state is a pair (x, o) of 9-bit integers, bit 3 * i + j being set
+when that player holds cell (i, j). Every query is a table lookup or a
+few bit operations; from_board and to_board convert to and from the
+list-of-lists boards used by tictactoe.py and runner.py.
+"""
+
+from functools import lru_cache
+
+from tictactoe import X, O, EMPTY
+
+FULL = 0b111111111
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100                # diagonals
+)
+
+# Indexed by a 9-bit mask of cells
+COUNTS = [bin(mask).count("1") for mask in range(FULL + 1)]
+WINS = [any(mask & win == win for win in WIN_MASKS)
+        for mask in range(FULL + 1)]
+MOVES = [tuple((bit // 3, bit % 3) for bit in range(9) if mask >> bit & 1)
+         for mask in range(FULL + 1)]
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the (x, o) state of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Returns the list-of-lists board of an (x, o) state.
+    """
+    x, o = state
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = state
+    return X if COUNTS[x] == COUNTS[o] else O
+
+
+def actions(state):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x, o = state
+    return set(MOVES[FULL & ~(x | o)])
+
+
+def result(state, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = state
+    bit = 1 << (3 * action[0] + action[1])
+    if (x | o) & bit:
+        raise NameError('Move is not valid')
+    if COUNTS[x] == COUNTS[o]:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+
+@lru_cache(maxsize=None)
+def value(x, o):
+    """
+    Returns the minimax value of a state for X, memoized per state.
+    """
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    empty = FULL & ~(x | o)
+    if not empty:
+        return 0
+    if COUNTS[x] == COUNTS[o]:
+        return max(value(x | 1 << bit, o)
+                   for bit in range(9) if empty >> bit & 1)
+    return min(value(x, o | 1 << bit)
+               for bit in range(9) if empty >> bit & 1)
+
+
+def minimax(state):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(state):
+        return None
+    x, o = state
+    choose = max if COUNTS[x] == COUNTS[o] else min
+    return choose(MOVES[FULL & ~(x | o)],
+                  key=lambda action: value(*result(state, action)))
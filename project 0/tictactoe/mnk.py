@@ -0,0 +1,267 @@
+"""
+m,n,k-game Player
+
+Generalizes tictactoe.py to an m-row, n-column board won by k in a row.
+Wins are detected incrementally around the last move only. Since full
+minimax is infeasible beyond 3x3, the AI runs depth-limited alpha-beta
+search with a heuristic evaluation, deepened iteratively until a time
+budget runs out.
+"""
+
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Value of a won position, before subtracting the plies taken to win
+WIN = 10 ** 9
+
+# Directions to scan from a move: right, down, down-right, down-left
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Game():
+    def __init__(self, m=3, n=3, k=3):
+        if k > max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.windows = self.lines_of_k()
+
+    def lines_of_k(self):
+        """
+        Returns every run of k cells in a straight line on the board.
+        """
+        windows = []
+        for i in range(self.m):
+            for j in range(self.n):
+                for di, dj in DIRECTIONS:
+                    end_i = i + di * (self.k - 1)
+                    end_j = j + dj * (self.k - 1)
+                    if 0 <= end_i < self.m and 0 <= end_j < self.n:
+                        windows.append(tuple((i + di * s, j + dj * s)
+                                             for s in range(self.k)))
+        return windows
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x_count = sum(row.count(X) for row in board)
+        o_count = sum(row.count(O) for row in board)
+        return X if x_count == o_count else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i, row in enumerate(board)
+                for j, cell in enumerate(row) if cell == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if board[i][j] != EMPTY:
+            raise NameError('Move is not valid')
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def is_win(self, board, action):
+        """
+        Returns True if the piece at `action` completes k in a row.
+        Only the lines through that cell are scanned.
+        """
+        i, j = action
+        piece = board[i][j]
+        if piece == EMPTY:
+            return False
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = i + sign * di, j + sign * dj
+                while (0 <= r < self.m and 0 <= c < self.n
+                       and board[r][c] == piece):
+                    count += 1
+                    r += sign * di
+                    c += sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for window in self.windows:
+            first = board[window[0][0]][window[0][1]]
+            if first != EMPTY and all(board[i][j] == first
+                                      for i, j in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1}.get(self.winner(board), 0)
+
+    def evaluate(self, board):
+        """
+        Returns a heuristic score of a board for X: every line of k
+        cells holding pieces of only one player scores 10 ** pieces for
+        that player.
+        """
+        score = 0
+        for window in self.windows:
+            xs = os = 0
+            for i, j in window:
+                cell = board[i][j]
+                if cell == X:
+                    xs += 1
+                elif cell == O:
+                    os += 1
+            if xs and not os:
+                score += 10 ** xs
+            elif os and not xs:
+                score -= 10 ** os
+        return score
+
+    def ordered_moves(self, board, first=None):
+        """
+        Returns the empty cells, `first` (if legal) then nearest the
+        centre first.
+        """
+        center_i, center_j = (self.m - 1) / 2, (self.n - 1) / 2
+        moves = sorted(self.actions(board), key=lambda move: (
+            abs(move[0] - center_i) + abs(move[1] - center_j), move))
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def minimax(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns the best action found for the current player within
+        `time_limit` seconds of iterative deepening.
+        """
+        return Search(self, time_limit, max_depth).run(board)
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta (negamax) search from one position.
+
+    `stop` is an optional threading.Event that ends the search early,
+    and `progress` an optional object whose depth and nodes attributes
+    are updated as the search runs.
+    """
+
+    def __init__(self, game, time_limit=1.0, max_depth=None, stop=None,
+                 progress=None):
+        self.game = game
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.stop = stop
+        self.progress = progress
+        self.nodes = 0
+        self.depth = 0
+        self.best_move = None
+        self.deadline = None
+
+    def run(self, board):
+        """
+        Returns the best action from the deepest completed iteration,
+        or None if the game is over.
+        """
+        game = self.game
+        if game.terminal(board):
+            return None
+        self.deadline = time.perf_counter() + self.time_limit
+        board = [row[:] for row in board]
+        piece = game.player(board)
+        empty = len(game.actions(board))
+        max_depth = min(self.max_depth or empty, empty)
+
+        self.best_move = game.ordered_moves(board)[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self.root(board, depth, piece)
+            except SearchTimeout:
+                break
+            self.best_move = move
+            self.depth = depth
+            if self.progress is not None:
+                self.progress.depth = depth
+            if abs(value) >= WIN - empty:
+                break
+        return self.best_move
+
+    def root(self, board, depth, piece):
+        alpha, beta = -WIN - 1, WIN + 1
+        best = None
+        for move in self.game.ordered_moves(board, self.best_move):
+            value = -self.negamax(board, move, piece, depth - 1, 1,
+                                  -beta, -alpha)
+            if best is None or value > alpha:
+                alpha, best = value, move
+        return alpha, best
+
+    def negamax(self, board, move, piece, depth, ply, alpha, beta):
+        """
+        Plays `move` for `piece` and returns the value of the resulting
+        position for the opponent, who is to move.
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            if self.progress is not None:
+                self.progress.nodes = self.nodes
+            if (time.perf_counter() > self.deadline
+                    or (self.stop is not None and self.stop.is_set())):
+                raise SearchTimeout
+
+        game = self.game
+        i, j = move
+        board[i][j] = piece
+        try:
+            if game.is_win(board, move):
+                return -(WIN - ply)
+            moves = game.ordered_moves(board)
+            if not moves:
+                return 0
+            opponent = O if piece == X else X
+            if depth == 0:
+                score = game.evaluate(board)
+                return score if opponent == X else -score
+
+            best = -WIN - 1
+            for reply in moves:
+                value = -self.negamax(board, reply, opponent, depth - 1,
+                                      ply + 1, -beta, -alpha)
+                if value > best:
+                    best = value
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+            return best
+        finally:
+            board[i][j] = EMPTY
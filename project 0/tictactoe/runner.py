@@ -2,7 +2,9 @@ import pygame
 import sys
 import time
 
+import mnk
 import tictactoe as ttt
+from worker import AIWorker, mnk_search, tictactoe_search
 
 pygame.init()
 size = width, height = 600, 400
@@ -19,7 +21,15 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+# python runner.py --mnk plays with the time-limited mnk search instead
+if "--mnk" in sys.argv[1:]:
+    ai = AIWorker(mnk_search(mnk.Game()))
+else:
+    ai = AIWorker(tictactoe_search)
+clock = pygame.time.Clock()
+
+# Minimum time the AI appears to think, in seconds
+ai_delay = 0.5
 
 while True:
 
@@ -102,21 +112,40 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (1 + int(time.time() * 3) % 3)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, computed in the background
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if not ai.busy() and ai.result() is None and ai.failed() is None:
+                ai.start(board)
+            move = ai.result()
+            error = ai.failed()
+            if error is not None:
+                # Play the first legal move rather than stalling the game
+                print(f"AI search failed: {error!r}", file=sys.stderr)
+                board = ttt.result(board, min(ttt.actions(board)))
+                ai.cancel()
+            elif move is not None and ai.progress.elapsed() >= ai_delay:
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                ai.cancel()
+            elif ai.progress is not None:
+                progress = ai.progress
+                if progress.solved:
+                    status = "solution table"
+                else:
+                    status = (f"{progress.searched():,} nodes, "
+                              f"{progress.nodes_per_second():,.0f} nodes/s")
+                    if progress.depth:
+                        status = f"depth {progress.depth}, {status}"
+                status = mediumFont.render(status, True, white)
+                statusRect = status.get_rect()
+                statusRect.center = ((width / 2), height - 30)
+                screen.blit(status, statusRect)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +170,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai.cancel()
 
     pygame.display.flip()
+    clock.tick(60)
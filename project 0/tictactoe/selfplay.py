@@ -0,0 +1,220 @@
+"""
+Headless batch self-play for evaluating the Tic Tac Toe AI.
+
+Plays N games across a process pool and reports outcomes, AI losses,
+per-move latency, nodes searched and move ordering effectiveness as
+JSON, for use as a regression benchmark of tictactoe.minimax.
+
+    python selfplay.py --games 1000 --mode random --engine search
+    python selfplay.py --engine search --cold --ordering center
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+MODES = ("ai", "random", "openings")
+ENGINES = ("table", "search")
+
+
+def openings():
+    """
+    Returns every distinct two-move opening (X's move, O's reply).
+    """
+    cells = [(i, j) for i in range(3) for j in range(3)]
+    return [[first, second]
+            for first, second in itertools.permutations(cells, 2)]
+
+
+def search_counters():
+    """
+    Returns the running search counters summed by summarize.
+    """
+    return {"expanded": ttt.searchStats["expanded"],
+            "moves_searched": ttt.searchStats["movesSearched"],
+            "cutoffs": ttt.tableStats["cutoffs"],
+            "first_move_cutoffs": ttt.searchStats["firstMoveCutoffs"]}
+
+
+def ai_move(board, engine):
+    """
+    Returns (move, seconds, nodes) for the AI on a board.
+    """
+    nodes = ttt.tableStats["nodes"]
+    start = time.perf_counter()
+    if engine == "table":
+        move = ttt.minimax(board)
+    else:
+        table = ttt.solutionTable
+        ttt.solutionTable = None
+        try:
+            move = ttt.minimax(board)
+        finally:
+            ttt.solutionTable = table
+    return move, time.perf_counter() - start, ttt.tableStats["nodes"] - nodes
+
+
+def play_game(game):
+    """
+    Plays one game described by a dict with mode, engine, seed,
+    ai (the side the AI plays, or None for both), opening, cold and
+    ordering. Returns a dict with the winner, per-move AI measurements
+    and the game's search counters.
+    """
+    rng = random.Random(game["seed"])
+    ttt.setMoveOrdering(game["ordering"])
+    if game["cold"]:
+        ttt.clearCache()
+    counters = search_counters()
+
+    board = ttt.initial_state()
+    scripted = list(game["opening"] or [])
+    latencies = []
+    nodes = []
+    while not ttt.terminal(board):
+        current = ttt.player(board)
+        if scripted:
+            move = scripted.pop(0)
+        elif game["ai"] is None or current == game["ai"]:
+            move, seconds, searched = ai_move(board, game["engine"])
+            latencies.append(seconds)
+            nodes.append(searched)
+        else:
+            move = rng.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, move)
+
+    winner = ttt.winner(board)
+    return {
+        "winner": winner,
+        "ai_lost": winner is not None and game["ai"] is not None
+                   and winner != game["ai"],
+        "latencies": latencies,
+        "nodes": nodes,
+        "search": {name: count - counters[name]
+                   for name, count in search_counters().items()}
+    }
+
+
+def schedule(mode, engine, count, seed=0, cold=False,
+             ordering=ttt.ORDERINGS):
+    """
+    Returns the list of game dicts for a run.
+    """
+    games = []
+    scripts = openings()
+    for n in range(count):
+        game = {"mode": mode, "engine": engine, "seed": seed + n,
+                "ai": None, "opening": None, "cold": cold,
+                "ordering": list(ordering)}
+        if mode == "random":
+            game["ai"] = ttt.X if n % 2 == 0 else ttt.O
+        elif mode == "openings":
+            game["opening"] = scripts[n % len(scripts)]
+        games.append(game)
+    return games
+
+
+def percentile_ms(ordered, fraction):
+    """
+    Returns a percentile of sorted latencies in seconds, in milliseconds.
+    """
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+def summarize(results, elapsed):
+    latencies = sorted(s for r in results for s in r["latencies"])
+    nodes = [n for r in results for n in r["nodes"]]
+    outcomes = {"X": 0, "O": 0, "draw": 0}
+    for r in results:
+        outcomes[r["winner"] or "draw"] += 1
+    search = {name: sum(r["search"][name] for r in results)
+              for name in search_counters()}
+    return {
+        "games": len(results),
+        "seconds": elapsed,
+        "games_per_second": len(results) / elapsed if elapsed else None,
+        "outcomes": outcomes,
+        "ai_losses": sum(r["ai_lost"] for r in results),
+        "moves": len(latencies),
+        "latency_ms": {
+            "p50": percentile_ms(latencies, 0.5),
+            "p99": percentile_ms(latencies, 0.99),
+            "max": percentile_ms(latencies, 1.0),
+            "mean": sum(latencies) / len(latencies) * 1000
+                    if latencies else None
+        },
+        "nodes": {
+            "total": sum(nodes),
+            "mean": sum(nodes) / len(nodes) if nodes else None,
+            "max": max(nodes, default=0)
+        },
+        "ordering": {
+            "cutoffs": search["cutoffs"],
+            "first_move_cutoff_rate":
+                search["first_move_cutoffs"] / search["cutoffs"]
+                if search["cutoffs"] else None,
+            "branching_factor":
+                search["moves_searched"] / search["expanded"]
+                if search["expanded"] else None
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Batch self-play for the Tic Tac Toe AI.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--mode", choices=MODES, default="random",
+                        help="ai: AI vs AI; random: AI vs random mover; "
+                             "openings: AI vs AI after scripted openings")
+    parser.add_argument("--engine", choices=ENGINES, default="table",
+                        help="answer by solution table or by live search")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the transposition table before each game")
+    parser.add_argument("--ordering", default=",".join(ttt.ORDERINGS),
+                        help="comma-separated move orderings to apply, from "
+                             f"{', '.join(ttt.ORDERINGS)}, or none")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="PATH",
+                        help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    ordering = [] if args.ordering == "none" else args.ordering.split(",")
+    unknown = set(ordering) - set(ttt.ORDERINGS)
+    if unknown:
+        parser.error(f"unknown move ordering: {', '.join(sorted(unknown))}")
+
+    games = schedule(args.mode, args.engine, args.games, args.seed, args.cold,
+                     ordering)
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        results = pool.map(play_game, games, chunksize=max(1, len(games) // 64))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "mode": args.mode,
+        "engine": args.engine,
+        "cold": args.cold,
+        "ordering": ordering,
+        "summary": summarize(results, elapsed)
+    }
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+    if report["summary"]["ai_losses"]:
+        sys.exit(f"AI lost {report['summary']['ai_losses']} games.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Solve Tic Tac Toe once and write the solution table.
+
+The table holds one byte per base-3 board index (3 ** 9 entries): for
+every reachable non-terminal board, the best move's cell (3 * i + j)
+in the high bits and the minimax value plus one in the low two bits;
+NO_ENTRY everywhere else. tictactoe.py loads it at import and answers
+minimax by lookup.
+
+    python solve.py             write solution.bin
+    python solve.py --verify    diff solution.bin against live search
+"""
+
+import argparse
+import sys
+
+import bitboard
+import tictactoe as ttt
+
+
+def state_index(state):
+    """
+    Returns the base-3 table index of a bitboard state, matching
+    tictactoe.boardIndex.
+    """
+    x, o = state
+    index = 0
+    for bit in reversed(range(9)):
+        index = index * 3 + (1 if x >> bit & 1 else 2 if o >> bit & 1 else 0)
+    return index
+
+
+def reachable_states():
+    """
+    Returns every state reachable from the empty board.
+    """
+    seen = set()
+    stack = [bitboard.initial_state()]
+    while stack:
+        state = stack.pop()
+        if state in seen:
+            continue
+        seen.add(state)
+        if not bitboard.terminal(state):
+            for action in bitboard.actions(state):
+                stack.append(bitboard.result(state, action))
+    return seen
+
+
+def build_table():
+    table = bytearray([ttt.NO_ENTRY]) * ttt.TABLE_SIZE
+    for state in reachable_states():
+        if bitboard.terminal(state):
+            continue
+        i, j = bitboard.minimax(state)
+        value = bitboard.value(*state)
+        table[state_index(state)] = (3 * i + j) << 2 | (value + 1)
+    return table
+
+
+def write_table(path=ttt.TABLE_PATH):
+    table = build_table()
+    with open(path, "wb") as f:
+        f.write(ttt.TABLE_MAGIC)
+        f.write(table)
+    return table
+
+
+def verify(path=ttt.TABLE_PATH):
+    """
+    Checks every reachable position's table entry against the live
+    search in tictactoe.py. Returns a list of mismatch descriptions.
+    """
+    table = ttt.loadTable(path)
+    if table is None:
+        return [f"{path} is missing or invalid"]
+    mismatches = []
+    for state in reachable_states():
+        board = bitboard.to_board(state)
+        entry = table[state_index(state)]
+        if bitboard.terminal(state):
+            if entry != ttt.NO_ENTRY:
+                mismatches.append(f"terminal board has an entry: {board}")
+            continue
+        if entry == ttt.NO_ENTRY:
+            mismatches.append(f"missing entry: {board}")
+            continue
+
+        move = divmod(entry >> 2, 3)
+        value = (entry & 3) - 1
+        if ttt.player(board) == ttt.X:
+            live = ttt.maxValue(board)["value"]
+        else:
+            live = ttt.minValue(board)["value"]
+        after = bitboard.result(state, move)
+        if value != live:
+            mismatches.append(f"value {value} != {live}: {board}")
+        elif bitboard.value(*after) != live:
+            mismatches.append(f"move {move} is not optimal: {board}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve Tic Tac Toe.")
+    parser.add_argument("--verify", action="store_true",
+                        help="diff the table against live search")
+    parser.add_argument("--output", default=ttt.TABLE_PATH)
+    args = parser.parse_args()
+
+    if args.verify:
+        mismatches = verify(args.output)
+        for mismatch in mismatches:
+            print(mismatch)
+        if mismatches:
+            sys.exit(f"{len(mismatches)} mismatches.")
+        print("Table matches live search.")
+    else:
+        table = write_table(args.output)
+        entries = sum(entry != ttt.NO_ENTRY for entry in table)
+        print(f"Wrote {entries} positions to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
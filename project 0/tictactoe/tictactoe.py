@@ -4,11 +4,82 @@ Tic Tac Toe Player
 
 import math
 import copy
+import os
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Cell orders of the 8 rotations/reflections of a flattened board
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],
+    [8, 5, 2, 7, 4, 1, 6, 3, 0]
+]
+
+# Transposition table flags: exact value, lower bound, upper bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps boardKey(board) to (value, flag, best move as a cell of the
+# canonical board, or None)
+transpositionTable = {}
+tableStats = {"nodes": 0, "hits": 0, "misses": 0, "cutoffs": 0}
+
+# Move ordering heuristics, applied in priority order:
+#   table   - best move stored in the transposition table first
+#   killer  - moves that caused a cutoff at the same depth next
+#   center  - center, then corners, then edges
+#   history - moves by how often they caused deep cutoffs
+# History only breaks ties here: ranked above center it roughly
+# doubles the nodes searched (see selfplay.py --ordering).
+ORDERINGS = ("table", "killer", "center", "history")
+moveOrdering = list(ORDERINGS)
+
+CENTER_RANK = {(i, j): 0 if (i, j) == (1, 1) else 1 if i != 1 and j != 1
+               else 2 for i in range(3) for j in range(3)}
+
+# Maps a move to its cutoff history score
+historyTable = {}
+
+# Maps a depth to the (up to two) most recent moves that cut off there
+killerMoves = {}
+
+searchStats = {"expanded": 0, "movesSearched": 0, "firstMoveCutoffs": 0,
+               "nodesPerDepth": {}}
+
+# Precomputed solution table written by solve.py: one byte per base-3
+# board index, (best cell << 2) | (value + 1), or NO_ENTRY
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "solution.bin")
+TABLE_MAGIC = b"TTTSOLV1"
+TABLE_SIZE = 3 ** 9
+NO_ENTRY = 0xFF
+
+
+def loadTable(path=TABLE_PATH):
+    """
+    Returns the solution table bytes, or None if there is no valid table.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if (len(data) != len(TABLE_MAGIC) + TABLE_SIZE
+            or not data.startswith(TABLE_MAGIC)):
+        return None
+    return data[len(TABLE_MAGIC):]
+
+
+solutionTable = loadTable()
+
 
 def initial_state():
     """
@@ -127,6 +198,13 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
+    if terminal(board):
+        return None
+
+    tableMove = solvedMove(board)
+    if tableMove is not None:
+        return tableMove
+
     currentPlayer = player(board)
     if currentPlayer == X:
         optimalAction = maxValue(board)
@@ -135,6 +213,18 @@ def minimax(board):
     
     return optimalAction['action']
 
+def solvedMove(board):
+    """
+    Returns the optimal action for the board from the solution table,
+    or None if there is no table or it has no entry for the board.
+    """
+    if solutionTable is None:
+        return None
+    entry = solutionTable[boardIndex(board)]
+    if entry == NO_ENTRY:
+        return None
+    return divmod(entry >> 2, 3)
+
 def isMoveValid(board, action):
     valid = False
     cell = board[action[0]][action[1]]
@@ -152,40 +242,202 @@ def getWinner(lines):
     
     return winner
 
-def maxValue(board):
-    possibleMoves = actions(board)
+def boardIndex(board):
+    """
+    Returns the base-3 index of a board in the solution table.
+    """
+    index = 0
+    for cell in reversed(sum(board, [])):
+        index = index * 3 + (0 if cell == EMPTY else 1 if cell == X else 2)
+    return index
 
-    bestResults = []
-    
-    for move in possibleMoves:
-        bestResult = dict()
-        newBoard = result(board, move)
-        if terminal(newBoard): 
-            bestResult["value"] = utility(newBoard)
-            bestResult["action"] = move
-            bestResults.append(bestResult)
-        else: 
-            bestResult = minValue(newBoard)
-            bestResult["action"] = move
-            bestResults.append(bestResult)
-    
-    return max(bestResults, key=lambda x:x['value'])
+def canonicalForm(board):
+    """
+    Returns (key, symmetry): a key shared by a board and its 8
+    rotations/reflections (the smallest base-3 encoding among them),
+    and the cell order from SYMMETRIES that produces it.
+    """
+    cells = sum(board, [])
+    codes = [0 if cell == EMPTY else 1 if cell == X else 2 for cell in cells]
+    key = None
+    best = None
+    for symmetry in SYMMETRIES:
+        code = 0
+        for idx in symmetry:
+            code = code * 3 + codes[idx]
+        if key is None or code < key:
+            key = code
+            best = symmetry
+    return key, best
 
-def minValue(board):
-    possibleMoves = actions(board)
+def boardKey(board):
+    """
+    Returns a key shared by a board and its 8 rotations/reflections.
+    """
+    return canonicalForm(board)[0]
 
-    bestResults = []
-    
-    for move in possibleMoves:
-        bestResult = dict()
-        newBoard = result(board,move)
-        if terminal(newBoard):
-            bestResult["value"] = utility(newBoard)
-            bestResult["action"] = move
-            bestResults.append(bestResult)
-        else:
-            bestResult = maxValue(newBoard)
-            bestResult["action"] = move
-            bestResults.append(bestResult)
-    
-    return min(bestResults, key=lambda x:x['value'])
\ No newline at end of file
+def cacheInfo():
+    """
+    Returns transposition table statistics.
+    """
+    info = dict(tableStats)
+    info["size"] = len(transpositionTable)
+    return info
+
+def clearCache():
+    """
+    Clears the transposition table, move ordering history and all
+    statistics.
+    """
+    transpositionTable.clear()
+    for stat in tableStats:
+        tableStats[stat] = 0
+    historyTable.clear()
+    killerMoves.clear()
+    searchStats["expanded"] = 0
+    searchStats["movesSearched"] = 0
+    searchStats["firstMoveCutoffs"] = 0
+    searchStats["nodesPerDepth"] = {}
+
+def setMoveOrdering(orderings):
+    """
+    Selects the move ordering heuristics (a list of names from
+    ORDERINGS, in priority order) used by maxValue and minValue.
+    """
+    for ordering in orderings:
+        if ordering not in ORDERINGS:
+            raise ValueError(f"unknown move ordering: {ordering}")
+    moveOrdering[:] = orderings
+
+def searchStatistics():
+    """
+    Returns search statistics: nodes visited per depth below the root,
+    cutoffs, how many of them came from the first move searched, and the
+    mean branching factor (moves searched per expanded node).
+    """
+    expanded = searchStats["expanded"]
+    cutoffs = tableStats["cutoffs"]
+    return {
+        "nodes": tableStats["nodes"],
+        "nodesPerDepth": dict(sorted(searchStats["nodesPerDepth"].items())),
+        "expanded": expanded,
+        "cutoffs": cutoffs,
+        "firstMoveCutoffs": searchStats["firstMoveCutoffs"],
+        "firstMoveCutoffRate":
+            searchStats["firstMoveCutoffs"] / cutoffs if cutoffs else None,
+        "branchingFactor":
+            searchStats["movesSearched"] / expanded if expanded else None
+    }
+
+def orderMoves(board, depth, tableMove=None):
+    """
+    Returns the actions on a board sorted by the enabled move orderings.
+    """
+    killers = killerMoves.get(depth, ())
+
+    def priority(move):
+        key = []
+        for ordering in moveOrdering:
+            if ordering == "table":
+                key.append(move != tableMove)
+            elif ordering == "killer":
+                key.append(move not in killers)
+            elif ordering == "history":
+                key.append(-historyTable.get(move, 0))
+            elif ordering == "center":
+                key.append(CENTER_RANK[move])
+        key.append(move)
+        return key
+
+    return sorted(actions(board), key=priority)
+
+def recordCutoff(board, move, depth, index):
+    """
+    Updates statistics and ordering heuristics after `move`, the
+    index-th move searched, caused a cutoff.
+    """
+    tableStats["cutoffs"] += 1
+    if index == 0:
+        searchStats["firstMoveCutoffs"] += 1
+    remaining = sum(board, []).count(EMPTY)
+    historyTable[move] = historyTable.get(move, 0) + remaining * remaining
+    killers = killerMoves.setdefault(depth, [])
+    if move not in killers:
+        killers.insert(0, move)
+        del killers[2:]
+
+def boardValue(board, alpha, beta, depth=1):
+    """
+    Returns the minimax value of a board, using the transposition table.
+    The value is exact if it lies strictly between alpha and beta, and
+    otherwise a bound on the exact value in the direction of the cutoff.
+    """
+    tableStats["nodes"] += 1
+    perDepth = searchStats["nodesPerDepth"]
+    perDepth[depth] = perDepth.get(depth, 0) + 1
+    if terminal(board):
+        return utility(board)
+
+    key, symmetry = canonicalForm(board)
+    entry = transpositionTable.get(key)
+    tableMove = None
+    if entry is not None:
+        value, flag, cell = entry
+        if (flag == EXACT or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)):
+            tableStats["hits"] += 1
+            return value
+        if cell is not None:
+            tableMove = divmod(symmetry[cell], 3)
+    tableStats["misses"] += 1
+
+    if player(board) == X:
+        best = maxValue(board, alpha, beta, depth, tableMove)
+    else:
+        best = minValue(board, alpha, beta, depth, tableMove)
+    value = best["value"]
+
+    if value <= alpha:
+        flag = UPPER
+    elif value >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    cell = None
+    if best["action"] is not None:
+        i, j = best["action"]
+        cell = symmetry.index(3 * i + j)
+    transpositionTable[key] = (value, flag, cell)
+    return value
+
+def maxValue(board, alpha=-math.inf, beta=math.inf, depth=0, tableMove=None):
+    bestResult = {"value": -math.inf, "action": None}
+    searchStats["expanded"] += 1
+
+    for index, move in enumerate(orderMoves(board, depth, tableMove)):
+        searchStats["movesSearched"] += 1
+        value = boardValue(result(board, move), alpha, beta, depth + 1)
+        if value > bestResult["value"]:
+            bestResult = {"value": value, "action": move}
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            recordCutoff(board, move, depth, index)
+            break
+
+    return bestResult
+
+def minValue(board, alpha=-math.inf, beta=math.inf, depth=0, tableMove=None):
+    bestResult = {"value": math.inf, "action": None}
+    searchStats["expanded"] += 1
+
+    for index, move in enumerate(orderMoves(board, depth, tableMove)):
+        searchStats["movesSearched"] += 1
+        value = boardValue(result(board, move), alpha, beta, depth + 1)
+        if value < bestResult["value"]:
+            bestResult = {"value": value, "action": move}
+        beta = min(beta, value)
+        if alpha >= beta:
+            recordCutoff(board, move, depth, index)
+            break
+
+    return bestResult
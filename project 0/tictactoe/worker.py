@@ -0,0 +1,143 @@
+"""
+Background AI move computation for the pygame runner.
+
+An AIWorker runs a search on a daemon thread so the event loop keeps
+rendering, exposes its progress (depth reached, nodes searched, nodes
+per second, or that the solution table answered without a search) and
+can be cancelled when the game is reset.
+"""
+
+import threading
+import time
+
+import mnk
+import tictactoe as ttt
+
+
+class Progress():
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.started = time.perf_counter()
+        self.depth = 0
+        self.nodes = 0
+        self.counter = None
+        self.solved = False
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def searched(self):
+        """
+        Returns the number of nodes searched so far.
+        """
+        return self.counter() if self.counter is not None else self.nodes
+
+    def nodes_per_second(self):
+        elapsed = self.elapsed()
+        return self.searched() / elapsed if elapsed else 0.0
+
+
+def tictactoe_search(board, progress):
+    """
+    Search with tictactoe.minimax, counting nodes from its table
+    statistics while it runs. It cannot be interrupted, but the worker
+    discards its result once cancelled.
+    """
+    move = ttt.solvedMove(board)
+    if move is not None:
+        progress.solved = True
+        return move
+    start = ttt.tableStats["nodes"]
+    progress.counter = lambda: ttt.tableStats["nodes"] - start
+    try:
+        return ttt.minimax(board)
+    finally:
+        progress.nodes = progress.searched()
+        progress.counter = None
+
+
+def mnk_search(game, time_limit=1.0):
+    """
+    Returns a search function running mnk iterative deepening on
+    `game`, reporting depth and nodes as it goes and stopping when
+    cancelled.
+    """
+    def search(board, progress):
+        searcher = mnk.Search(game, time_limit, stop=progress.cancelled,
+                              progress=progress)
+        move = searcher.run(board)
+        progress.nodes = searcher.nodes
+        return move
+    return search
+
+
+class AIWorker():
+    def __init__(self, search=tictactoe_search):
+        self.search = search
+        self.thread = None
+        self.progress = None
+        self.move = None
+        self.error = None
+        self.done = False
+        self.lock = threading.Lock()
+
+    def start(self, board):
+        """
+        Start searching for a move on a copy of the board.
+        """
+        self.cancel()
+        progress = Progress()
+        board = [row[:] for row in board]
+        with self.lock:
+            self.progress = progress
+            self.move = None
+            self.error = None
+            self.done = False
+        self.thread = threading.Thread(target=self.run,
+                                       args=(board, progress), daemon=True)
+        self.thread.start()
+
+    def run(self, board, progress):
+        move = None
+        error = None
+        try:
+            move = self.search(board, progress)
+        except Exception as e:
+            # Finish with the error instead of staying busy forever
+            error = e
+        with self.lock:
+            # Ignore the result of a search that was cancelled or replaced
+            if progress is self.progress and not progress.cancelled.is_set():
+                self.move = move
+                self.error = error
+                self.done = True
+
+    def busy(self):
+        return self.progress is not None and not self.done
+
+    def result(self):
+        """
+        Returns the move once the search has finished, else None.
+        """
+        with self.lock:
+            return self.move if self.done else None
+
+    def failed(self):
+        """
+        Returns the exception the search raised once it has finished,
+        else None.
+        """
+        with self.lock:
+            return self.error if self.done else None
+
+    def cancel(self):
+        """
+        Stop the current search, if any, and forget its result.
+        """
+        with self.lock:
+            if self.progress is not None:
+                self.progress.cancelled.set()
+            self.progress = None
+            self.move = None
+            self.error = None
+            self.done = False
@@ -0,0 +1,154 @@
+"""
+Compiled, bit-parallel evaluation of logic.py sentences.
+
+compile_sentence turns a Sentence into generated Python code with one
+statement per distinct subformula, evaluated over a list of integers
+indexed by symbol rather than a dict keyed by name. Each integer holds
+the symbol's truth value in many models at once, one model per bit, so
+a single call evaluates a whole block of the truth table with bitwise
+operators: & for And, | for Or, ~ for Not, ~a | b for Implication and
+~(a ^ b) for Biconditional.
+"""
+
+from functools import lru_cache
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+# Models evaluated per call: 2 ** BLOCK_BITS
+BLOCK_BITS = 6
+
+
+class CompiledSentence():
+    def __init__(self, sentence, symbols=None):
+        self.sentence = sentence
+        self.symbols = (sorted(sentence.symbols()) if symbols is None
+                        else list(symbols))
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+        self.source = self.generate(sentence)
+        namespace = {}
+        exec(compile(self.source, "<compiled sentence>", "exec"), namespace)
+        self.function = namespace["evaluate"]
+
+    def generate(self, sentence):
+        """Returns the source of a function evaluating the sentence."""
+        lines = []
+        temps = {}
+
+        def emit(sentence):
+            if isinstance(sentence, Symbol):
+                if sentence.name not in self.index:
+                    raise Exception(f"variable {sentence.name} not in model")
+                return f"m[{self.index[sentence.name]}]"
+            if sentence in temps:
+                return temps[sentence]
+            if isinstance(sentence, Not):
+                expr = f"~{emit(sentence.operand)}"
+            elif isinstance(sentence, And):
+                expr = " & ".join(emit(c) for c in sentence.conjuncts) or "-1"
+            elif isinstance(sentence, Or):
+                expr = " | ".join(emit(d) for d in sentence.disjuncts) or "0"
+            elif isinstance(sentence, Implication):
+                antecedent = emit(sentence.antecedent)
+                expr = f"~{antecedent} | {emit(sentence.consequent)}"
+            elif isinstance(sentence, Biconditional):
+                left = emit(sentence.left)
+                expr = f"~({left} ^ {emit(sentence.right)})"
+            else:
+                raise TypeError(f"cannot compile {sentence!r}")
+            temps[sentence] = f"t{len(temps)}"
+            lines.append(f"    {temps[sentence]} = {expr}")
+            return temps[sentence]
+
+        result = emit(sentence)
+        return "def evaluate(m):\n" + "".join(
+            line + "\n" for line in lines) + f"    return {result}\n"
+
+    def evaluate(self, model):
+        """Evaluates the sentence in one model, a dict like
+        Sentence.evaluate takes."""
+        masks = []
+        for name in self.symbols:
+            try:
+                masks.append(-1 if model[name] else 0)
+            except KeyError:
+                raise Exception(f"variable {name} not in model")
+        return bool(self.function(masks) & 1)
+
+    def evaluate_block(self, block, block_bits=BLOCK_BITS):
+        """Evaluates the sentence in the block-th run of 2 ** block_bits
+        models, where model k assigns symbol i the value of bit i of k.
+        Returns a mask with bit j set if the sentence is true in model
+        block * 2 ** block_bits + j."""
+        return self.function(truth_table(len(self.symbols), block,
+                                         block_bits))
+
+
+def compile_sentence(sentence, symbols=None):
+    """Compiles a sentence over the given symbol names (by default its
+    own symbols, sorted). Recently compiled sentences are reused."""
+    if symbols is None:
+        symbols = sorted(sentence.symbols())
+    return cached_compile(sentence, tuple(symbols))
+
+
+@lru_cache(maxsize=256)
+def cached_compile(sentence, symbols):
+    return CompiledSentence(sentence, symbols)
+
+
+def truth_table(count, block, block_bits=BLOCK_BITS):
+    """Returns the masks of `count` symbols for the block-th run of
+    2 ** block_bits models."""
+    width = 1 << block_bits
+    masks = []
+    for i in range(count):
+        if i < block_bits:
+            # Runs of 2 ** i zeros then ones, repeated across the block
+            run = (1 << (1 << i)) - 1
+            period = 1 << (i + 1)
+            masks.append(sum(run << (start + (1 << i))
+                             for start in range(0, width, period)))
+        else:
+            masks.append(-1 if block >> (i - block_bits) & 1 else 0)
+    return masks
+
+
+def model_check(knowledge, query, block_bits=BLOCK_BITS):
+    """Checks if knowledge base entails query by evaluating both over
+    the truth table, 2 ** block_bits models per call, looking for a
+    model of knowledge ∧ ¬query."""
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge = compile_sentence(knowledge, symbols).function
+    query = compile_sentence(query, symbols).function
+    block_bits = min(block_bits, len(symbols))
+    full = (1 << (1 << block_bits)) - 1
+    masks = truth_table(len(symbols), 0, block_bits)
+    for block in range(1 << (len(symbols) - block_bits)):
+        for i in range(block_bits, len(symbols)):
+            masks[i] = -1 if block >> (i - block_bits) & 1 else 0
+        if knowledge(masks) & ~query(masks) & full:
+            return False
+    return True
+
+
+def entailed(knowledge, queries, block_bits=BLOCK_BITS):
+    """Returns the queries knowledge entails, in order, evaluating the
+    knowledge base once per block of models for all of them."""
+    symbols = sorted(set.union(knowledge.symbols(),
+                               *[query.symbols() for query in queries]))
+    knowledge = compile_sentence(knowledge, symbols).function
+    remaining = [(query, compile_sentence(query, symbols).function)
+                 for query in queries]
+    block_bits = min(block_bits, len(symbols))
+    full = (1 << (1 << block_bits)) - 1
+    masks = truth_table(len(symbols), 0, block_bits)
+    for block in range(1 << (len(symbols) - block_bits)):
+        if not remaining:
+            break
+        for i in range(block_bits, len(symbols)):
+            masks[i] = -1 if block >> (i - block_bits) & 1 else 0
+        models = knowledge(masks) & full
+        if models:
+            remaining = [(query, function) for query, function in remaining
+                         if not models & ~function(masks)]
+    return [query for query, _ in remaining]
@@ -1,7 +1,58 @@
+import inspect
 import itertools
+import weakref
+
+
+class Interned(type):
+    """Makes structurally equal sentences one shared, immutable instance:
+    building a sentence that already exists returns the existing one.
+
+    A KnowledgeBase operand is replaced by a snapshot of its current
+    conjuncts, so later additions to it cannot change the sentence."""
+
+    def __call__(cls, *operands, **kwargs):
+        if kwargs:
+            operands = inspect.signature(cls.__init__).bind(
+                None, *operands, **kwargs).args[1:]
+        operands = tuple(operand.snapshot()
+                         if isinstance(operand, KnowledgeBase) else operand
+                         for operand in operands)
+        if not cls.interned:
+            return super().__call__(*operands)
+        key = (cls, operands)
+        sentence = Sentence.instances.get(key)
+        if sentence is None:
+            sentence = super().__call__(*operands)
+            object.__setattr__(sentence, "frozen", True)
+            Sentence.instances[key] = sentence
+        return sentence
+
+
+class Sentence(metaclass=Interned):
+
+    # Live sentences by class and operands. Since equal sentences are the
+    # same object, equality is identity, and the hash and symbols of each
+    # node are computed once, from those of its children.
+    instances = weakref.WeakValueDictionary()
+    interned = True
+    frozen = False
+    hash = 0
+    symbol_set = frozenset()
 
+    def __hash__(self):
+        return self.hash
+
+    def __setattr__(self, name, value):
+        if self.frozen:
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        super().__setattr__(name, value)
 
-class Sentence():
+    def __reduce__(self):
+        return (type(self), self.operands())
+
+    def operands(self):
+        """Returns the arguments the sentence was built from."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +64,7 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set)
 
     @classmethod
     def validate(cls, sentence):
@@ -46,12 +97,11 @@ class Symbol(Sentence):
 
     def __init__(self, name):
         self.name = name
+        self.hash = hash(("symbol", name))
+        self.symbol_set = frozenset([name])
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def operands(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -65,20 +115,16 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
+        self.hash = hash(("not", operand.hash))
+        self.symbol_set = operand.symbol_set
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def operands(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,24 +135,22 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+        self.conjuncts = conjuncts
+        self.hash = hash(
+            ("and", tuple(conjunct.hash for conjunct in conjuncts))
+        )
+        self.symbol_set = frozenset().union(
+            *[conjunct.symbol_set for conjunct in conjuncts]
         )
 
+    def operands(self):
+        return tuple(self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -114,35 +158,118 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError("And is immutable; use KnowledgeBase to add conjuncts")
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+class KnowledgeBase(And):
+    """A conjunction meant to grow with add. Unlike other sentences it is
+    mutable and never shared: it compares equal to an And with the same
+    conjuncts, keeps its symbols and the hashes of its conjuncts up to
+    date as they are added, and checks many queries against every model
+    in one pass."""
 
-class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+    interned = False
+
+    def __init__(self, *conjuncts):
+        super().__init__(*conjuncts)
+        self.conjuncts = list(conjuncts)
+        self.conjunct_hashes = [conjunct.hash for conjunct in conjuncts]
+        self.symbol_set = set(self.symbol_set)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return (isinstance(other, And)
+                and tuple(self.conjuncts) == tuple(other.conjuncts))
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        if self.hash is None:
+            self.hash = hash(("and", tuple(self.conjunct_hashes)))
+        return self.hash
+
+    def __repr__(self):
+        conjunctions = ", ".join(
+            [str(conjunct) for conjunct in self.conjuncts]
         )
+        return f"KnowledgeBase({conjunctions})"
+
+    def add(self, conjunct):
+        Sentence.validate(conjunct)
+        if isinstance(conjunct, KnowledgeBase):
+            conjunct = conjunct.snapshot()
+        self.conjuncts.append(conjunct)
+        self.conjunct_hashes.append(conjunct.hash)
+        self.symbol_set |= conjunct.symbol_set
+        self.hash = None
+
+    def snapshot(self):
+        """Returns the current conjuncts as an immutable And."""
+        return And(*self.conjuncts)
+
+    def entails(self, query, backend="enumerate", simplify=False):
+        """Checks if the knowledge base entails query."""
+        return model_check(self, query, backend, simplify)
+
+    def entailed(self, queries, backend="enumerate", simplify=False):
+        """Returns the queries the knowledge base entails, in order,
+        checking all of them in a single pass over the models. With
+        simplify=True the knowledge base and queries are simplified
+        first."""
+        queries = list(queries)
+        if simplify:
+            import simplify as simplifier
+            knowledge = simplifier.simplify(self)
+            simplified = [simplifier.simplify(query) for query in queries]
+            entailed = set(knowledge.entailed(simplified, backend))
+            return [query for query, short in zip(queries, simplified)
+                    if short in entailed]
+        if backend == "compiled":
+            import compiled
+            return compiled.entailed(self, queries)
+        if backend == "sat":
+            import sat
+            return sat.entailed(self, queries)
+        if backend != "enumerate":
+            raise ValueError(f"unknown model checking backend: {backend}")
+
+        symbols = sorted(set.union(self.symbols(),
+                                   *[query.symbols() for query in queries]))
+        remaining = queries
+        for values in itertools.product((True, False), repeat=len(symbols)):
+            if not remaining:
+                break
+            model = dict(zip(symbols, values))
+
+            # Queries must be true in every model of the knowledge base
+            if self.evaluate(model):
+                remaining = [query for query in remaining
+                             if query.evaluate(model)]
+        return remaining
+
+
+class Or(Sentence):
+    def __init__(self, *disjuncts):
+        for disjunct in disjuncts:
+            Sentence.validate(disjunct)
+        self.disjuncts = disjuncts
+        self.hash = hash(
+            ("or", tuple(disjunct.hash for disjunct in disjuncts))
+        )
+        self.symbol_set = frozenset().union(
+            *[disjunct.symbol_set for disjunct in disjuncts]
+        )
+
+    def operands(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -152,14 +279,13 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -167,14 +293,11 @@ class Implication(Sentence):
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
+        self.hash = hash(("implies", antecedent.hash, consequent.hash))
+        self.symbol_set = antecedent.symbol_set | consequent.symbol_set
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def operands(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,9 +311,6 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -198,35 +318,49 @@ class Biconditional(Sentence):
         Sentence.validate(right)
         self.left = left
         self.right = right
+        self.hash = hash(("biconditional", left.hash, right.hash))
+        self.symbol_set = left.symbol_set | right.symbol_set
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def operands(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def model_check(knowledge, query, backend="enumerate", simplify=False):
+    """Checks if knowledge base entails query.
+
+    The "enumerate" backend checks every truth assignment, which takes
+    time exponential in the number of symbols. The "compiled" backend
+    checks the same models, but many at a time with bitwise operations
+    in generated code (see compiled.py). The "sat" backend instead asks
+    a SAT solver whether knowledge ∧ ¬query is unsatisfiable (see
+    sat.py), which scales to far larger knowledge bases.
+
+    With simplify=True both sentences are simplified first (see
+    simplify.py).
+    """
+    if simplify:
+        import simplify as simplifier
+        return model_check(simplifier.simplify(knowledge),
+                           simplifier.simplify(query), backend)
+    if backend == "compiled":
+        import compiled
+        return compiled.model_check(knowledge, query)
+    if backend == "sat":
+        import sat
+        return sat.entails(knowledge, query)
+    if backend != "enumerate":
+        raise ValueError(f"unknown model checking backend: {backend}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
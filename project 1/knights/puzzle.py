@@ -13,7 +13,7 @@ CKnave = Symbol("C is a Knave")
 # A says "I am both a knight and a knave."
 ASays_0 = And(AKnight, AKnave)
 
-knowledge0 = And(
+knowledge0 = KnowledgeBase(
     Or(AKnight, AKnave),
 )
 knowledge0.add(Biconditional(AKnight, ASays_0))
@@ -24,7 +24,7 @@ knowledge0.add(Biconditional(AKnave, Not(ASays_0)))
 ASays_1 = And(AKnave, BKnave)
 # B says nothing.
 
-knowledge1 = And(
+knowledge1 = KnowledgeBase(
     Or(AKnight, AKnave),
     Or(BKnight, BKnave),       
 )
@@ -39,7 +39,7 @@ ASays_2 = Or(And(AKnight, BKnight), And(AKnave, BKnave))
 # B says "We are of different kinds."
 BSays_2 = Or(Biconditional(AKnight, BKnave), Biconditional(BKnight, AKnave))
 
-knowledge2 = And(
+knowledge2 = KnowledgeBase(
     Or(AKnight, AKnave),
     Or(BKnight, BKnave),  
 )
@@ -61,7 +61,7 @@ BSays_again = CKnave
 # C says "A is a knight."
 CSays_3 = AKnight
 
-knowledge3 = And(
+knowledge3 = KnowledgeBase(
     Or(AKnight, AKnave),
     Or(BKnight, BKnave),
     Or(CKnight, CKnave), 
@@ -93,9 +93,8 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
-                    print(f"    {symbol}")
+            for symbol in knowledge.entailed(symbols):
+                print(f"    {symbol}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,462 @@
+"""
+SAT-based entailment for logic.py.
+
+Sentences are converted to conjunctive normal form with the Tseitin
+encoding (one fresh variable per connective, so the CNF grows linearly
+with the sentence) and handed to a CDCL solver with two watched
+literals per clause, first-UIP clause learning, decisions taken from a
+heap ordered by variable activity, Luby restarts and periodic removal
+of the least useful learnt clauses. A knowledge base entails a query
+exactly when the knowledge base together with the negated query is
+unsatisfiable.
+"""
+
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+# Conflicts between restarts, scaled by the Luby sequence
+RESTART_BASE = 100
+# Learnt clauses kept before the first clause database reduction
+LEARNT_LIMIT = 2000
+
+
+class CNF():
+    """Clauses over integer variables; literal -v is the negation of v."""
+
+    def __init__(self):
+        self.variables = {}
+        self.clauses = []
+        self.literals = {}
+        self.count = 0
+
+    def fresh(self):
+        """Returns a new variable."""
+        self.count += 1
+        return self.count
+
+    def symbol(self, name):
+        """Returns the variable of a symbol name."""
+        if name not in self.variables:
+            self.variables[name] = self.fresh()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence, adding the
+        Tseitin clauses that define it."""
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            g = self.fresh()
+            self.clauses.extend([-g, part] for part in parts)
+            self.clauses.append([g] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            g = self.fresh()
+            self.clauses.extend([g, -part] for part in parts)
+            self.clauses.append([-g] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            g = self.fresh()
+            self.clauses.extend([[-g, -a, b], [g, a], [g, -b]])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            g = self.fresh()
+            self.clauses.extend([[-g, -a, b], [-g, a, -b],
+                                 [g, a, b], [g, -a, -b]])
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+        self.literals[sentence] = g
+        return g
+
+    def add(self, sentence, simplify=False):
+        """Asserts a sentence, simplified first if simplify is True.
+        Conjunctions and disjunctions of literals at the top are added
+        as clauses directly."""
+        Sentence.validate(sentence)
+        if simplify:
+            import simplify as simplifier
+            sentence = simplifier.simplify(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(d) for d in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+class Solver():
+    """CDCL SAT solver. Clauses may be added between calls to solve."""
+
+    def __init__(self, cnf=None):
+        self.values = [None]
+        # Truth value of each literal, indexed by the literal itself:
+        # -v wraps around to the back half of the list
+        self.lits = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        # Binary max-heap of variables by activity, and each variable's
+        # index in it (None once popped)
+        self.order = []
+        self.positions = [None]
+        self.watches = {}
+        # Watched clauses, and (literal block distance, clause) pairs of
+        # learnt ones, which reductions discard the worst half of
+        self.clauses = []
+        self.learnts = []
+        self.max_learnts = LEARNT_LIMIT
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        self.increment = 1.0
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.restarts = 0
+        if cnf is not None:
+            for clause in cnf.clauses:
+                self.add_clause(clause)
+            self.reserve(cnf.count)
+
+    def reserve(self, count):
+        """Makes room for variables up to count."""
+        while len(self.values) <= count:
+            self.values.append(None)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+            self.positions.append(None)
+            self.insert(len(self.values) - 1)
+        if len(self.lits) <= 2 * count:
+            # Grow by doubling, since the halves must be laid out again
+            capacity = max(count, len(self.lits))
+            self.lits = [None] * (2 * capacity + 1)
+            for var, value in enumerate(self.values):
+                if value is not None:
+                    self.lits[var] = value
+                    self.lits[-var] = not value
+
+    def value(self, lit):
+        """Returns True, False or None (unassigned) for a literal."""
+        return self.lits[lit]
+
+    def assign(self, lit, reason):
+        var = abs(lit)
+        self.values[var] = lit > 0
+        self.lits[lit] = True
+        self.lits[-lit] = False
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def watch(self, clause):
+        self.watches.setdefault(-clause[0], []).append(clause)
+        self.watches.setdefault(-clause[1], []).append(clause)
+
+    def add_clause(self, literals):
+        """Adds a clause. Returns False if the clauses became
+        unsatisfiable."""
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        clause = []
+        for lit in literals:
+            if -lit in clause:
+                return self.ok
+            if lit not in clause:
+                clause.append(lit)
+        self.reserve(max((abs(lit) for lit in clause), default=0))
+        clause = [lit for lit in clause if self.value(lit) is not False]
+        if any(self.value(lit) for lit in clause):
+            return self.ok
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return self.ok
+
+    def propagate(self):
+        """Propagates every assignment on the trail. Returns a
+        conflicting clause, or None."""
+        lits = self.lits
+        watches = self.watches
+        trail = self.trail
+        while self.head < len(trail):
+            lit = trail[self.head]
+            self.head += 1
+            self.propagations += 1
+            # Clauses watching -lit, which just became false
+            watchers = watches.get(lit)
+            if not watchers:
+                continue
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                if clause[0] == -lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if lits[first] is True:
+                    i += 1
+                    continue
+                for k in range(2, len(clause)):
+                    if lits[clause[k]] is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        watches.setdefault(-clause[1], []).append(clause)
+                        watchers[i] = watchers[-1]
+                        watchers.pop()
+                        break
+                else:
+                    if lits[first] is False:
+                        return clause
+                    self.assign(first, clause)
+                    i += 1
+        return None
+
+    def analyze(self, conflict):
+        """Returns (learnt clause, backjump level) for a conflict, by
+        resolving back to the first unique implication point."""
+        level = len(self.trail_lim)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                var = abs(q)
+                if q == lit or var in seen or self.levels[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if self.levels[var] == level:
+                    pending += 1
+                else:
+                    learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            clause = self.reasons[abs(lit)]
+            pending -= 1
+            if pending == 0:
+                break
+        learnt[0] = -lit
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the highest-level literal after the asserting one
+        top = max(range(1, len(learnt)),
+                  key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[top] = learnt[top], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            # Rescaling every activity keeps the heap ordered
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+        if self.positions[var] is not None:
+            self.sift_up(self.positions[var])
+
+    def insert(self, var):
+        """Adds a variable to the decision heap if it is not there."""
+        if self.positions[var] is None:
+            self.positions[var] = len(self.order)
+            self.order.append(var)
+            self.sift_up(self.positions[var])
+
+    def sift_up(self, i):
+        order, positions, activity = self.order, self.positions, self.activity
+        var = order[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if activity[order[parent]] >= activity[var]:
+                break
+            order[i] = order[parent]
+            positions[order[i]] = i
+            i = parent
+        order[i] = var
+        positions[var] = i
+
+    def sift_down(self, i):
+        order, positions, activity = self.order, self.positions, self.activity
+        var = order[i]
+        while True:
+            child = 2 * i + 1
+            if child >= len(order):
+                break
+            if (child + 1 < len(order)
+                    and activity[order[child + 1]] > activity[order[child]]):
+                child += 1
+            if activity[order[child]] <= activity[var]:
+                break
+            order[i] = order[child]
+            positions[order[i]] = i
+            i = child
+        order[i] = var
+        positions[var] = i
+
+    def backtrack(self, level):
+        """Undoes every assignment above a decision level."""
+        if len(self.trail_lim) <= level:
+            return
+        for lit in self.trail[self.trail_lim[level]:]:
+            var = abs(lit)
+            self.phases[var] = self.values[var]
+            self.values[var] = None
+            self.lits[lit] = None
+            self.lits[-lit] = None
+            self.reasons[var] = None
+            self.insert(var)
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity, or
+        None if every variable is assigned. Assigned variables popped
+        on the way are put back when backtracking unassigns them."""
+        order, positions = self.order, self.positions
+        while order:
+            var = order[0]
+            last = order.pop()
+            positions[var] = None
+            if order:
+                order[0] = last
+                positions[last] = 0
+                self.sift_down(0)
+            if self.values[var] is None:
+                return var
+        return None
+
+    def reduce(self):
+        """Discards the learnt clauses with the highest literal block
+        distance, keeping half of them and every glue clause (distance
+        2 or less). Only called at decision level 0, where no learnt
+        clause is the reason for an assignment analyze can reach."""
+        self.learnts.sort(key=lambda item: (item[0], len(item[1])))
+        half = len(self.learnts) // 2
+        self.learnts = [item for i, item in enumerate(self.learnts)
+                        if i < half or item[0] <= 2]
+        self.watches = {}
+        for clause in self.clauses:
+            self.watch(clause)
+        for _, clause in self.learnts:
+            self.watch(clause)
+        self.max_learnts *= 1.1
+
+    def solve(self, assumptions=()):
+        """Returns True if the clauses are satisfiable with every
+        assumption literal true, storing a satisfying assignment in
+        model, and False otherwise."""
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        self.reserve(max((abs(lit) for lit in assumptions), default=0))
+        conflicts = 0
+        try:
+            while True:
+                conflict = self.propagate()
+                if conflict is not None:
+                    self.conflicts += 1
+                    conflicts += 1
+                    if not self.trail_lim:
+                        self.ok = False
+                        return False
+                    learnt, level = self.analyze(conflict)
+                    distance = len({self.levels[abs(lit)] for lit in learnt})
+                    self.backtrack(level)
+                    if len(learnt) > 1:
+                        self.watch(learnt)
+                        self.learnts.append((distance, learnt))
+                    self.assign(learnt[0], learnt if len(learnt) > 1 else None)
+                    self.increment /= 0.95
+                    continue
+
+                if conflicts >= RESTART_BASE * luby(self.restarts + 1):
+                    self.restarts += 1
+                    conflicts = 0
+                    self.backtrack(0)
+                    if len(self.learnts) > self.max_learnts:
+                        self.reduce()
+                    continue
+
+                # Assumptions are the first decisions
+                if len(self.trail_lim) < len(assumptions):
+                    lit = assumptions[len(self.trail_lim)]
+                    if self.value(lit) is False:
+                        return False
+                    self.trail_lim.append(len(self.trail))
+                    if self.value(lit) is None:
+                        self.assign(lit, None)
+                    continue
+
+                var = self.decide()
+                if var is None:
+                    self.model = list(self.values)
+                    return True
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self.assign(var if self.phases[var] else -var, None)
+        finally:
+            self.backtrack(0)
+
+
+def luby(i):
+    """Returns the i-th term, from 1, of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    k = i.bit_length()
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+def satisfiable(sentence):
+    """Returns a satisfying model of a sentence as a dict from symbol
+    names to truth values, or None if it is unsatisfiable."""
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf)
+    if not solver.solve():
+        return None
+    return {name: solver.model[var] for name, var in cnf.variables.items()}
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query: knowledge ∧ ¬query is
+    unsatisfiable."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not Solver(cnf).solve()
+
+
+def entailed(knowledge, queries):
+    """Returns the queries knowledge entails, in order. One solver holds
+    the knowledge base, and each query is checked by assuming it false,
+    so clauses learnt for one query speed up the rest."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    literals = [cnf.literal(query) for query in queries]
+    solver = Solver(cnf)
+    return [query for query, literal in zip(queries, literals)
+            if not solver.solve([-literal])]
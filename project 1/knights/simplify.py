@@ -0,0 +1,219 @@
+"""
+Simplification of logic.py sentences.
+
+simplify rewrites a sentence into an equivalent, usually smaller one:
+negations are pushed down to symbols and implications expanded
+(negation normal form), nested Ands and Ors are flattened, duplicate
+and constant operands removed, and absorbed or subsumed operands
+dropped (A ∧ (A ∨ B) becomes A). Biconditionals are kept, since
+expanding them copies both sides; ¬(A <=> B) becomes A <=> ¬B. The
+constants are the empty conjunction TRUE and the empty disjunction
+FALSE.
+
+Pushing negations down adds a node per negated symbol, and expanding
+an implication adds one too, so a rewrite can be larger than the
+input; simplify then returns the input unchanged. With
+push_negations=False a negation over a compound formula is kept as it
+is.
+
+model_check, KnowledgeBase.entails and KnowledgeBase.entailed in
+logic.py and CNF.add in sat.py simplify their operands first when
+passed simplify=True.
+
+    python simplify.py    # node counts for the puzzle.py knowledge bases
+"""
+
+from logic import (Symbol, Not, And, Or, Implication,
+                   Biconditional, KnowledgeBase)
+
+TRUE = And()
+FALSE = Or()
+
+
+def size(sentence, counts=None):
+    """Returns the number of nodes in a sentence's tree."""
+    if counts is None:
+        counts = {}
+    if sentence not in counts:
+        counts[sentence] = 1 + sum(size(operand, counts)
+                                   for operand in children(sentence))
+    return counts[sentence]
+
+
+def distinct(sentence):
+    """Returns the number of distinct subformulas of a sentence, its
+    size once shared subformulas are counted once."""
+    seen = set()
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if sentence not in seen:
+            seen.add(sentence)
+            stack.extend(children(sentence))
+    return len(seen)
+
+
+def children(sentence):
+    if isinstance(sentence, Symbol):
+        return ()
+    return sentence.operands()
+
+
+def nnf(sentence, negate=False, memo=None, push=True):
+    """Returns a sentence (negated if `negate`) in negation normal form:
+    And, Or, Biconditional and Not applied to symbols. Implications are
+    always expanded; other negations are only pushed down if `push`."""
+    if memo is None:
+        memo = {}
+    key = (sentence, negate)
+    if key in memo:
+        return memo[key]
+
+    if isinstance(sentence, Symbol):
+        result = Not(sentence) if negate else sentence
+    elif isinstance(sentence, Not):
+        result = nnf(sentence.operand, not negate, memo, push)
+    elif negate and not push and not isinstance(sentence, Implication):
+        result = Not(nnf(sentence, False, memo, push))
+    elif isinstance(sentence, (And, Or)):
+        operands = [nnf(operand, negate, memo, push)
+                    for operand in sentence.operands()]
+        # De Morgan: negating swaps And and Or
+        if isinstance(sentence, And) != negate:
+            result = And(*operands)
+        else:
+            result = Or(*operands)
+    elif isinstance(sentence, Implication):
+        result = nnf(Or(Not(sentence.antecedent), sentence.consequent),
+                     negate, memo, push)
+    elif isinstance(sentence, Biconditional):
+        result = Biconditional(nnf(sentence.left, False, memo, push),
+                               nnf(sentence.right, negate, memo, push))
+    else:
+        raise TypeError(f"cannot normalize {sentence!r}")
+    memo[key] = result
+    return result
+
+
+def negation(sentence):
+    """Returns the complement of a literal or constant."""
+    if sentence is TRUE:
+        return FALSE
+    if sentence is FALSE:
+        return TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def combine(cls, operands):
+    """Returns an equivalent of cls(*operands) for cls And or Or, with
+    operands already simplified."""
+    identity, annihilator = (TRUE, FALSE) if cls is And else (FALSE, TRUE)
+    dual = Or if cls is And else And
+
+    # Flatten, and drop duplicates and identities
+    flat = []
+    seen = set()
+    for operand in operands:
+        nested = (operand.operands() if type(operand) is cls
+                  and operand is not identity else (operand,))
+        for item in nested:
+            if item is annihilator:
+                return annihilator
+            if item is not identity and item not in seen:
+                seen.add(item)
+                flat.append(item)
+
+    # A ∧ ¬A is FALSE, A ∨ ¬A is TRUE
+    if any(negation(item) in seen for item in flat
+           if isinstance(item, (Symbol, Not))):
+        return annihilator
+
+    # Absorption: A ∧ (A ∨ B) is A, and (A ∨ B) ∧ (A ∨ B ∨ C) is A ∨ B
+    groups = [frozenset(item.operands()) if type(item) is dual
+              else frozenset([item]) for item in flat]
+    kept = []
+    for i, item in enumerate(flat):
+        if not any(j != i and groups[j] <= groups[i]
+                   and (groups[j] != groups[i] or j < i)
+                   for j in range(len(flat))):
+            kept.append(item)
+
+    if len(kept) == 1:
+        return kept[0]
+    return cls(*kept)
+
+
+def equivalence(left, right, memo, push):
+    """Returns an equivalent of Biconditional(left, right), with both
+    sides already simplified."""
+    if left is TRUE:
+        return right
+    if right is TRUE:
+        return left
+    if left is FALSE:
+        return reduce(nnf(right, True, push=push), memo, push)
+    if right is FALSE:
+        return reduce(nnf(left, True, push=push), memo, push)
+    if left is right:
+        return TRUE
+    if isinstance(left, (Symbol, Not)) and negation(left) is right:
+        return FALSE
+    return Biconditional(left, right)
+
+
+def simplify(sentence, push_negations=True):
+    """Returns a simplified sentence equivalent to the given one, in
+    negation normal form unless push_negations is False, or the
+    sentence itself if simplifying would make it larger. A
+    KnowledgeBase simplifies to a KnowledgeBase."""
+    memo = {}
+    result = reduce(nnf(sentence, push=push_negations), memo, push_negations)
+    if size(result) >= size(sentence):
+        result = sentence
+    if isinstance(sentence, KnowledgeBase):
+        return KnowledgeBase(*(result.operands()
+                               if isinstance(result, And) else (result,)))
+    return result
+
+
+def reduce(sentence, memo, push):
+    if sentence in memo:
+        return memo[sentence]
+    if isinstance(sentence, Symbol):
+        result = sentence
+    elif isinstance(sentence, Not):
+        operand = reduce(sentence.operand, memo, push)
+        if push and isinstance(operand, (And, Or, Biconditional)):
+            # Folding can leave a compound under a negation
+            result = reduce(nnf(operand, True), memo, push)
+        else:
+            result = negation(operand)
+    elif isinstance(sentence, Biconditional):
+        result = equivalence(reduce(sentence.left, memo, push),
+                             reduce(sentence.right, memo, push), memo, push)
+    else:
+        result = combine(type(sentence),
+                         [reduce(operand, memo, push)
+                          for operand in sentence.operands()])
+    memo[sentence] = result
+    return result
+
+
+def main():
+    import puzzle
+
+    for name in ("knowledge0", "knowledge1", "knowledge2", "knowledge3"):
+        knowledge = getattr(puzzle, name)
+        print(f"{name}: {size(knowledge)} nodes "
+              f"({distinct(knowledge)} distinct)")
+        for push in (True, False):
+            simplified = simplify(knowledge, push)
+            form = "negation normal form" if push else "negations kept"
+            print(f"    {form}: {size(simplified)} nodes "
+                  f"({distinct(simplified)} distinct)")
+
+
+if __name__ == "__main__":
+    main()